@@ -0,0 +1,130 @@
+# ===============================
+# File: agent_config.py
+# ===============================
+import os
+import threading
+from typing import Dict, NamedTuple, Optional
+from prompts import compile_agent_prompt
+import yaml
+
+AGENTS_CONFIG_PATH = 'config/agents.yaml'
+TASKS_CONFIG_PATH = 'config/tasks.yaml'
+
+# Map agent types to task names
+TASK_MAP = {
+    "summarizer": "summary_task",
+    "action_point_specialist": "actionable_insights_task",
+    "claims_analyst": "claims_identification_task",
+    "fact_checker": "fact_checking_task",
+    "content_auditor": "quality_audit_task"
+}
+
+
+# Used for agents that declare no `model` in agents.yaml
+DEFAULT_MODEL = "openai/gpt-4"
+DEFAULT_AGENT_MODELS = {"fact_checker": "perplexity/llama-3.1-sonar-huge-128k-online"}
+
+
+class ModelSettings(NamedTuple):
+    """Which model an agent calls and with what limits"""
+    provider: str
+    model: str
+    temperature: Optional[float] = None
+    max_tokens: Optional[int] = None
+    # Wall-clock seconds before the request is abandoned for the fallback model, if any
+    timeout: Optional[float] = None
+    fallback: Optional["ModelSettings"] = None
+
+    @property
+    def options(self) -> Dict:
+        """Client options that are set"""
+        options = {"temperature": self.temperature, "max_tokens": self.max_tokens, "timeout": self.timeout}
+        return {name: value for name, value in options.items() if value is not None}
+
+
+def _split_model(spec: str):
+    """'perplexity/llama-...' -> ('perplexity', 'llama-...'); a bare model name is an OpenAI one"""
+    provider, _, model = spec.partition("/")
+    return (provider, model) if model else ("openai", provider)
+
+
+def parse_model_settings(agent_type: str, agent_config: Dict) -> ModelSettings:
+    """
+    Read an agent's `model`, `temperature`, `max_tokens`, `timeout` and
+    `fallback_model` keys. The fallback shares the agent's limits.
+    """
+    limits = {
+        "temperature": agent_config.get("temperature"),
+        "max_tokens": agent_config.get("max_tokens"),
+        "timeout": agent_config.get("timeout"),
+    }
+    fallback = None
+    if agent_config.get("fallback_model"):
+        fallback = ModelSettings(*_split_model(agent_config["fallback_model"]), **limits)
+    spec = agent_config.get("model") or DEFAULT_AGENT_MODELS.get(agent_type, DEFAULT_MODEL)
+    return ModelSettings(*_split_model(spec), **limits, fallback=fallback)
+
+
+class AgentConfig(NamedTuple):
+    agents: Dict
+    tasks: Dict
+    # Rendered role and task text per agent type
+    prompts: Dict[str, str]
+    models: Dict[str, ModelSettings]
+
+
+class ConfigStore:
+    """
+    Parsed agents.yaml and tasks.yaml, shared by every analyzer in the process.
+
+    The files are parsed and the agent prompts rendered once; later calls
+    only stat the files and reparse them when either modification time has
+    changed, so edits are picked up without restarting the app.
+    """
+
+    def __init__(self, agents_path: str = AGENTS_CONFIG_PATH, tasks_path: str = TASKS_CONFIG_PATH):
+        self.agents_path = agents_path
+        self.tasks_path = tasks_path
+        self._mtimes = None
+        self._config = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> AgentConfig:
+        with open(self.agents_path, 'r') as f:
+            agents_config = yaml.safe_load(f)
+        with open(self.tasks_path, 'r') as f:
+            tasks_config = yaml.safe_load(f)
+
+        if not agents_config or not tasks_config:
+            raise ValueError("Failed to load YAML configurations")
+
+        prompts = {
+            agent_type: compile_agent_prompt(agents_config[agent_type], tasks_config[task_name])
+            for agent_type, task_name in TASK_MAP.items()
+        }
+        models = {
+            agent_type: parse_model_settings(agent_type, agents_config[agent_type])
+            for agent_type in TASK_MAP
+        }
+        return AgentConfig(agents_config, tasks_config, prompts, models)
+
+    def get(self) -> AgentConfig:
+        mtimes = (os.stat(self.agents_path).st_mtime_ns, os.stat(self.tasks_path).st_mtime_ns)
+        with self._lock:
+            if self._config is None or mtimes != self._mtimes:
+                self._config = self._load()
+                self._mtimes = mtimes
+            return self._config
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_config_store() -> ConfigStore:
+    """Return the process-wide store for the default config files"""
+    global _default_store
+    with _default_store_lock:
+        if _default_store is None:
+            _default_store = ConfigStore()
+        return _default_store
@@ -1,124 +1,779 @@
 # ===============================
 # File: agents.py
 # ===============================
-from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_openai import ChatOpenAI
-from langchain_community.chat_models import ChatPerplexity
-from langchain_core.messages import AIMessage, HumanMessage
-from langchain.tools import Tool
-from typing import List, Dict
-from utils import get_youtube_transcription
-import yaml
+from typing import List, Dict, Callable, Iterator, NamedTuple, Optional, Tuple
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from contextlib import contextmanager
+import asyncio
+import contextvars
+import queue
+import threading
+from utils import get_youtube_transcription, get_transcript_timings, extract_video_id, transcript_cache
+from analysis_index import AnalysisIndex, get_analysis_index
+from pipeline import Stage, run_stages, parallel_map, run_stages_async, parallel_map_async
+from llm_cache import ResponseCache, make_cache_key, get_default_response_cache
+from chunking import count_tokens, split_by_tokens
+from salience import select_salient
+from prompts import build_messages, record_prompt_tokens, summarize_token_report, token_report
+from telemetry import span, start_trace, estimate_cost
+from fact_check import parse_claims, verdict_key, format_verdict, get_verdict_cache
+from singleflight import analysis_flights, llm_flights
+from rate_limit import (get_limiter, provider_for, call_with_rate_limit, acall_with_rate_limit,
+                        COMPLETION_TOKEN_ESTIMATE)
+from agent_config import TASK_MAP, get_config_store
+from clients import get_model_client, is_timeout
+from config import (MAX_CONCURRENT_STAGES, FACT_CHECK_CONCURRENCY, WHISPER_MODEL, WHISPER_PIPELINE,
+                    PIPELINE_QUEUE_SIZE)
+
+# Appended to the prompt of the reduce call that merges per-chunk results
+REDUCE_INSTRUCTIONS = (
+    "The input is a set of partial results, each produced from one consecutive section "
+    "of the same transcript. Merge them into a single result for the whole transcript, "
+    "removing duplicates and keeping the expected output format."
+)
+
+# Tokenizer for chunk budgets and estimates, whichever model a stage is routed to
+TOKEN_COUNT_MODEL = "gpt-4"
+
+# Agents whose stages map-reduce over the transcript (when their task sets `chunking`)
+CHUNKED_AGENTS = ("summarizer", "action_point_specialist", "claims_analyst")
+
+# Used when the fact checker is given one claim at a time
+SINGLE_CLAIM_INSTRUCTIONS = (
+    "The input is a single claim. Reply with exactly one line: the verdict emoji "
+    "followed by the claim and a short justification."
+)
+
+def _model_name(llm) -> str:
+    return getattr(llm, 'model_name', None) or getattr(llm, 'model', None)
+
+def _response_tokens(response) -> Optional[int]:
+    """Total tokens the provider reported for a response, if any"""
+    return (getattr(response, 'usage_metadata', None) or {}).get('total_tokens')
+
+def _within_deadline(request: Callable, timeout: Optional[float], on_token: Optional[Callable[[str], None]]):
+    """
+    Call request(on_token) on its own thread, waiting at most timeout wall-clock seconds.
+
+    The client's own timeout only bounds each network read, so a slowly
+    streamed response could otherwise run on indefinitely. A request past
+    its deadline is abandoned rather than interrupted: its next token raises
+    instead of reaching on_token, which ends the stream, and a non-streamed
+    request ends at the client's timeout.
+    """
+    if not timeout:
+        return request(on_token)
+    lock = threading.Lock()
+    expired = []
+
+    def forward(text):
+        with lock:
+            if expired:
+                raise TimeoutError("Response abandoned past its deadline")
+            on_token(text)
+
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(request(forward if on_token else None))
+        except BaseException as e:
+            future.set_exception(e)
+
+    threading.Thread(target=contextvars.copy_context().run, args=(run,), daemon=True).start()
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        with lock:
+            expired.append(True)
+        raise TimeoutError(f"No complete response within {timeout}s")
+
+class _Call(NamedTuple):
+    """One agent call, prepared identically for the sync and async paths"""
+    llm: object
+    fallback: object
+    # Wall-clock seconds each model may take to answer (None: no limit)
+    timeout: Optional[float]
+    model_name: str
+    messages: List[Dict]
+    cache_key: str
+    use_cache: bool
+    prompt_tokens: int
+    estimated_tokens: int
 
 class PodcastAnalyzer:
-    def __init__(self, openai_api_key: str, perplexity_api_key: str):
-        # Load configurations
-        with open('config/agents.yaml', 'r') as f:
-            self.agents_config = yaml.safe_load(f)
-        with open('config/tasks.yaml', 'r') as f:
-            self.tasks_config = yaml.safe_load(f)
-            
-        if not self.agents_config or not self.tasks_config:
-            raise ValueError("Failed to load YAML configurations")
-
-        # Map agent types to task names
-        self.task_map = {
-            "transcriber": "transcription_task",
-            "summarizer": "summary_task",
-            "action_point_specialist": "actionable_insights_task",
-            "claims_analyst": "claims_identification_task",
-            "fact_checker": "fact_checking_task",
-            "content_auditor": "quality_audit_task"
-        }
+    def __init__(self, openai_api_key: str, perplexity_api_key: str, max_concurrency: int = None,
+                 response_cache: ResponseCache = None, analysis_index: AnalysisIndex = None):
+        # Parsed once per process and reloaded when the YAML files change
+        self.config_store = get_config_store()
+        self.config_store.get()  # fail early on unreadable configs
+        self.task_map = TASK_MAP
 
-        # Configure models
-        self.gpt_llm = ChatOpenAI(
-            temperature=0.2,
-            model="gpt-4",
-            openai_api_key=openai_api_key
-        )
-        
-        self.pplx_llm = ChatPerplexity(
-            api_key=perplexity_api_key,
-            model="llama-3.1-sonar-huge-128k-online"
+        # Each agent's model comes from agents.yaml; clients are shared per API key
+        self.api_keys = {"openai": openai_api_key, "perplexity": perplexity_api_key}
+
+        # Upper bound on stages running at the same time
+        self.max_concurrency = max_concurrency or MAX_CONCURRENT_STAGES
+
+        # Cache of model responses shared across analyzers (None disables caching)
+        self.response_cache = response_cache or get_default_response_cache()
+
+        # Fact-check verdicts per normalized claim, shared across videos
+        self.verdict_cache = get_verdict_cache()
+
+        # Finished analyses, searchable by keyword, claim and timestamp (None disables indexing)
+        self.analysis_index = analysis_index or get_analysis_index()
+
+    @property
+    def agents_config(self) -> Dict:
+        return self.config_store.get().agents
+
+    @property
+    def tasks_config(self) -> Dict:
+        return self.config_store.get().tasks
+
+    def _create_agent_prompt(self, agent_type: str, instructions: str = None) -> str:
+        """Create a prompt from the agent's precompiled role and task"""
+        prompt = self.config_store.get().prompts[agent_type]
+        if instructions:
+            prompt = f"{prompt}\n\nNote: {instructions}"
+        return prompt
+
+    def _models_for(self, agent_type: str):
+        """Return the agent's configured client, its fallback client (or None), their timeout and max_tokens"""
+        settings = self.config_store.get().models[agent_type]
+        fallback = get_model_client(settings.fallback, self.api_keys) if settings.fallback else None
+        return get_model_client(settings, self.api_keys), fallback, settings.timeout, settings.max_tokens
+
+    def _prepare_call(self, text: str, agent_type: str, model, use_cache: bool, instructions: str) -> _Call:
+        """Pick the models and lay out the messages of one agent call, recording their prompt tokens"""
+        prompt = self._create_agent_prompt(agent_type, instructions)
+        llm, fallback, timeout, max_tokens = ((model, None, None, getattr(model, 'max_tokens', None))
+                                              if model is not None else self._models_for(agent_type))
+        model_name = _model_name(llm)
+
+        # The input is sent once, ahead of the agent's role and task
+        messages = build_messages(text, prompt)
+        prompt_tokens = record_prompt_tokens(agent_type, messages, text, TOKEN_COUNT_MODEL)
+
+        # Stages can opt out of the response cache with `cache: false` in agents.yaml
+        use_cache = (use_cache and self.response_cache is not None
+                     and self.agents_config[agent_type].get('cache', True))
+        # Reserve the completion the agent may produce; its max_tokens when configured
+        return _Call(llm, fallback, timeout, model_name, messages,
+                     make_cache_key(model_name, getattr(llm, 'temperature', None), messages),
+                     use_cache, prompt_tokens, (max_tokens or COMPLETION_TOKEN_ESTIMATE) + prompt_tokens)
+
+    def _cached_response(self, call: _Call, attributes: Dict) -> Optional[str]:
+        """Return the cached response to a call, if the response cache applies and has one"""
+        if not call.use_cache:
+            return None
+        cached = self.response_cache.get(call.cache_key)
+        attributes["cache_hit"] = cached is not None
+        return cached
+
+    def _fallback_for(self, call: _Call, error: Exception, attributes: Dict):
+        """Return the client to retry a failed call on, or re-raise error if there is none"""
+        if call.fallback is None or not is_timeout(error):
+            raise error
+        # Over the stage's time budget: answer from the fallback model
+        attributes["fallback"] = _model_name(call.fallback)
+        return call.fallback
+
+    def _finish_call(self, call: _Call, attributes: Dict, response, client) -> str:
+        """Record a response's usage and cache it, unless it came from the fallback model"""
+        content = response.content if response is not None else ""
+        self._record_usage(attributes, response, call.prompt_tokens, content, _model_name(client))
+        if call.use_cache and client is call.llm:
+            self.response_cache.set(call.cache_key, content)
+        return content
+
+    @staticmethod
+    def _joined(leader: List, content: str, attributes: Dict, on_token: Callable[[str], None]) -> str:
+        """Account for a call that joined an identical one in flight, passing its result to on_token"""
+        if not leader:
+            # The leader's span records the cache lookup; a joined call is neither hit nor miss
+            attributes.pop("cache_hit", None)
+            attributes["coalesced"] = True
+            if on_token:
+                on_token(content)
+        return content
+
+    def _process_with_agent(self, text: str, agent_type: str, model=None, use_cache: bool = True,
+                            instructions: str = None, on_token: Callable[[str], None] = None) -> str:
+        """
+        Process text using specified agent configuration.
+
+        When on_token is given the response is streamed and every chunk of text
+        is passed to it as it arrives; a cached response arrives as one chunk.
+        If the model runs past its timeout after streaming part of an answer,
+        on_token(None) is called before the fallback model's answer: the text
+        streamed so far is void.
+        """
+        call = self._prepare_call(text, agent_type, model, use_cache, instructions)
+
+        with span("llm", agent=agent_type, model=call.model_name) as attributes:
+            cached = self._cached_response(call, attributes)
+            if cached is not None:
+                if on_token:
+                    on_token(cached)
+                return cached
+
+            def request(client):
+                def run(forward):
+                    if forward is None:
+                        return client.invoke(call.messages)
+                    response = None
+                    for chunk in client.stream(call.messages):
+                        response = chunk if response is None else response + chunk
+                        if chunk.content:
+                            streamed.append(True)
+                            forward(chunk.content)
+                    return response
+                return _within_deadline(run, call.timeout, on_token)
+
+            def send():
+                leader.append(True)
+                client = call.llm
+                try:
+                    # Every session shares the provider's request and token budget
+                    response = call_with_rate_limit(get_limiter(provider_for(client)), lambda: request(client),
+                                                    call.estimated_tokens, usage=_response_tokens)
+                except Exception as e:
+                    client = self._fallback_for(call, e, attributes)
+                    if streamed:
+                        on_token(None)
+                    response = call_with_rate_limit(get_limiter(provider_for(client)), lambda: request(client),
+                                                    call.estimated_tokens, usage=_response_tokens)
+                return self._finish_call(call, attributes, response, client)
+
+            # An identical call already in flight is joined instead of repeated
+            leader, streamed = [], []
+            return self._joined(leader, llm_flights.do(call.cache_key, send), attributes, on_token)
+
+    async def _aprocess_with_agent(self, text: str, agent_type: str, model=None, use_cache: bool = True,
+                                   instructions: str = None, on_token: Callable[[str], None] = None) -> str:
+        """
+        _process_with_agent on the event loop, with ainvoke / astream.
+
+        Token counting and the cache database run on threads, so only the
+        model calls and on_token happen on the loop.
+        """
+        call = await asyncio.to_thread(self._prepare_call, text, agent_type, model, use_cache, instructions)
+
+        with span("llm", agent=agent_type, model=call.model_name) as attributes:
+            cached = await asyncio.to_thread(self._cached_response, call, attributes)
+            if cached is not None:
+                if on_token:
+                    on_token(cached)
+                return cached
+
+            async def stream(client):
+                response = None
+                async for chunk in client.astream(call.messages):
+                    response = chunk if response is None else response + chunk
+                    if chunk.content:
+                        streamed.append(True)
+                        on_token(chunk.content)
+                return response
+
+            async def request(client):
+                # A wall-clock limit: the client's own timeout only bounds each read
+                return await asyncio.wait_for(
+                    client.ainvoke(call.messages) if on_token is None else stream(client), call.timeout
+                )
+
+            async def send():
+                leader.append(True)
+                client = call.llm
+                try:
+                    response = await acall_with_rate_limit(get_limiter(provider_for(client)),
+                                                           lambda: request(client),
+                                                           call.estimated_tokens, usage=_response_tokens)
+                except Exception as e:
+                    client = self._fallback_for(call, e, attributes)
+                    if streamed:
+                        on_token(None)
+                    response = await acall_with_rate_limit(get_limiter(provider_for(client)),
+                                                           lambda: request(client),
+                                                           call.estimated_tokens, usage=_response_tokens)
+                return await asyncio.to_thread(self._finish_call, call, attributes, response, client)
+
+            leader, streamed = [], []
+            return self._joined(leader, await llm_flights.ado(call.cache_key, send), attributes, on_token)
+
+    def _record_usage(self, attributes: Dict, response, prompt_tokens: int, content: str, model_name: str):
+        """Store token counts and estimated cost on a span, using our own counts if the provider sent none"""
+        usage = getattr(response, 'usage_metadata', None) or {}
+        if usage.get('input_tokens') is not None:
+            prompt_tokens = usage['input_tokens']
+        completion_tokens = usage.get('output_tokens')
+        if completion_tokens is None:
+            completion_tokens = count_tokens(content, TOKEN_COUNT_MODEL)
+
+        attributes.update(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                          cost_usd=estimate_cost(model_name, prompt_tokens, completion_tokens))
+
+    def _salient_input(self, text: str, agent_type: str) -> str:
+        """
+        Shorten a transcript to its most salient sentences when the agent's
+        task sets `salience` (tasks.yaml); the reduction is recorded on a span.
+        """
+        salience = self.tasks_config[self.task_map[agent_type]].get('salience')
+        if not salience:
+            return text
+        with span("salience", agent=agent_type) as attributes:
+            text, stats = select_salient(text, salience['max_tokens'], salience.get('context', 1),
+                                         TOKEN_COUNT_MODEL)
+            attributes.update(stats)
+        return text
+
+    def _plan_chunks(self, text: str, agent_type: str) -> Tuple[List[str], int]:
+        """
+        Return the inputs to map an agent over, after any salience pre-filter,
+        and how many of them to process at once.
+
+        Inputs within the task's `chunking.max_tokens` budget (tasks.yaml) stay
+        whole; longer ones are split on token counts with overlap.
+        """
+        text = self._salient_input(text, agent_type)
+        chunking = self.tasks_config[self.task_map[agent_type]].get('chunking')
+        if not chunking:
+            return [text], 1
+        chunks = split_by_tokens(text, chunking['max_tokens'], chunking.get('overlap', 0), TOKEN_COUNT_MODEL)
+        return chunks, chunking.get('parallelism', 1)
+
+    @staticmethod
+    def _reduce_input(partials: List[str]) -> str:
+        """Lay out per-chunk results as the input of the reduce call"""
+        return "\n\n".join(
+            f"Part {i} of {len(partials)}:\n{partial}" for i, partial in enumerate(partials, 1)
         )
 
-    def _create_agent_prompt(self, agent_type: str, input_text: str) -> str:
-        """Create a prompt from agent configuration"""
-        agent_config = self.agents_config[agent_type]
-        task_name = self.task_map[agent_type]
-        task_config = self.tasks_config[task_name]
-        
-        # Replace any placeholders in the task description
-        task_description = task_config['description']
-        if '{youtube_url}' in task_description:
-            task_description = task_description.replace('{youtube_url}', input_text)
+    def _process_chunked(self, text: str, agent_type: str, on_token: Callable[[str], None] = None) -> str:
+        """
+        Map-reduce an agent over a long input (see _plan_chunks).
+
+        A single chunk goes through one call. Otherwise the chunks are
+        processed in parallel and one reduce call merges the partial results.
+        Only the final call is streamed to on_token.
+        """
+        chunks, parallelism = self._plan_chunks(text, agent_type)
+        if len(chunks) == 1:
+            return self._process_with_agent(chunks[0], agent_type, on_token=on_token)
 
-        return f"""Role: {agent_config['role']}
+        partials = parallel_map(lambda chunk: self._process_with_agent(chunk, agent_type), chunks, parallelism)
+        return self._reduce_partials(partials, agent_type, on_token)
 
-Goal: {agent_config['goal']}
+    def _reduce_partials(self, partials: List[str], agent_type: str, on_token: Callable[[str], None] = None) -> str:
+        """Merge per-chunk results with one reduce call; a single chunk's result is already final"""
+        if len(partials) == 1:
+            return partials[0]
+        return self._process_with_agent(self._reduce_input(partials), agent_type,
+                                        instructions=REDUCE_INSTRUCTIONS, on_token=on_token)
 
-Background: {agent_config['backstory']}
+    async def _aprocess_chunked(self, text: str, agent_type: str, on_token: Callable[[str], None] = None) -> str:
+        """_process_chunked on the event loop, planning the chunks on a thread"""
+        chunks, parallelism = await asyncio.to_thread(self._plan_chunks, text, agent_type)
+        if len(chunks) == 1:
+            return await self._aprocess_with_agent(chunks[0], agent_type, on_token=on_token)
 
-Task: {task_description}
+        partials = await parallel_map_async(lambda chunk: self._aprocess_with_agent(chunk, agent_type),
+                                            chunks, parallelism)
+        return await self._areduce_partials(partials, agent_type, on_token)
+
+    async def _areduce_partials(self, partials: List[str], agent_type: str,
+                                on_token: Callable[[str], None] = None) -> str:
+        """_reduce_partials on the event loop"""
+        if len(partials) == 1:
+            return partials[0]
+        return await self._aprocess_with_agent(self._reduce_input(partials), agent_type,
+                                               instructions=REDUCE_INSTRUCTIONS, on_token=on_token)
+
+    def _transcribe_and_map(self, youtube_url: str):
+        """
+        Whisper-transcribe a video while the chunked stages map over the transcript so far.
+
+        Decoding, transcription and the map calls run at once, joined by
+        bounded buffers: ffmpeg output is cut into segments for the Whisper
+        pool (iter_transcript), and each `chunking.max_tokens` of finished
+        transcript is put on a queue of PIPELINE_QUEUE_SIZE chunks for the
+        LLM workers, which run every chunked agent's map call on it. A full
+        queue holds back transcription, which holds back decoding.
+
+        Agents with a salience pre-filter are left out: they need the whole
+        transcript to rank its sentences, and run once it is complete.
+
+        Returns the transcript and each chunked agent's partial results in order.
+        """
+        # Imported here: it pulls in torch
+        from transcription import iter_transcript
+
+        chunking = {
+            agent_type: self.tasks_config[self.task_map[agent_type]]['chunking']
+            for agent_type in CHUNKED_AGENTS
+            if self.tasks_config[self.task_map[agent_type]].get('chunking')
+            and not self.tasks_config[self.task_map[agent_type]].get('salience')
+        }
+        budget = min((config['max_tokens'] for config in chunking.values()), default=float("inf"))
+        workers = max([config.get('parallelism', 1) for config in chunking.values()] + [1])
 
-Expected Output: {task_config['expected_output']}
+        chunks = queue.Queue(maxsize=max(1, PIPELINE_QUEUE_SIZE))
+        partials = {agent_type: {} for agent_type in chunking}
+        errors = []
 
-Input: {input_text}"""
+        def work():
+            while True:
+                item = chunks.get()
+                if item is None:
+                    return
+                # After a failure keep draining so the producer never blocks on a full queue
+                if errors:
+                    continue
+                index, chunk = item
+                try:
+                    for agent_type in chunking:
+                        partials[agent_type][index] = self._process_with_agent(chunk, agent_type)
+                except Exception as e:
+                    errors.append(e)
 
-    def _process_with_agent(self, text: str, agent_type: str, model=None) -> str:
-        """Process text using specified agent configuration"""
-        prompt = self._create_agent_prompt(agent_type, text)
-        llm = model or self.gpt_llm
-        
-        messages = [
-            {"role": "system", "content": prompt},
-            {"role": "user", "content": text}
+        threads = [
+            threading.Thread(target=contextvars.copy_context().run, args=(work,), daemon=True)
+            for _ in range(workers)
         ]
-        
-        response = llm.invoke(messages)
-        return response.content
+        for thread in threads:
+            thread.start()
 
-    def analyze_podcast(self, youtube_url: str) -> Dict:
-        """Main function to analyze podcast content"""
+        pieces, pending, pending_tokens, count = [], [], 0, 0
+        timings, position = {"starts": [], "offsets": []}, 0
+        video_id = extract_video_id(youtube_url)
+        transcribed = iter_transcript(youtube_url, WHISPER_MODEL)
         try:
-            # 1. Transcription
-            transcript = get_youtube_transcription(youtube_url)
-            if not transcript or transcript.startswith("Error"):
-                raise Exception(f"Transcription failed: {transcript}")
-
-            # 2. Summary using the summarizer agent
-            summary = self._process_with_agent(transcript, "summarizer")
-            
-            # 3. Action Points using the action_point_specialist agent
-            actions = self._process_with_agent(transcript, "action_point_specialist")
-            
-            # 4. Claims Analysis using the claims_analyst agent
-            claims = self._process_with_agent(transcript, "claims_analyst")
-            
-            # 5. Fact Checking using the fact_checker agent (with Perplexity)
-            facts = self._process_with_agent(claims, "fact_checker", self.pplx_llm)
-            
-            # 6. Final Audit using the content_auditor agent
-            audit_input = f"""
-Summary: {summary}
-
-Action Points: {actions}
-
-Claims Analysis: {claims}
-
-Fact Check Results: {facts}
+            with span("whisper", model=WHISPER_MODEL):
+                for start, piece in transcribed:
+                    # A failed map call fails the analysis: stop transcribing right away
+                    if errors:
+                        break
+                    if not piece:
+                        continue
+                    timings["starts"].append(round(start, 2))
+                    timings["offsets"].append(position)
+                    position += len(piece) + 1
+                    tokens = count_tokens(piece, TOKEN_COUNT_MODEL)
+                    if pending and pending_tokens + tokens > budget:
+                        chunks.put((count, " ".join(pending)))
+                        count += 1
+                        pending, pending_tokens = [], 0
+                    pieces.append(piece)
+                    pending.append(piece)
+                    pending_tokens += tokens
+                if pending and not errors:
+                    chunks.put((count, " ".join(pending)))
+                    count += 1
+        finally:
+            # Stops decoding and drops queued segments if the loop ended early
+            transcribed.close()
+            for _ in threads:
+                chunks.put(None)
+            for thread in threads:
+                thread.join()
+
+        if errors:
+            raise errors[0]
+        transcript = " ".join(pieces)
+        if transcript:
+            transcript_cache.put(video_id, "whisper", transcript, WHISPER_MODEL, timings=timings)
+        mapped = {
+            agent_type: [results[index] for index in range(count)]
+            for agent_type, results in partials.items()
+            if count
+        }
+        return transcript, mapped
+
+    def _cached_verdict(self, claim: str, attributes: Dict) -> Tuple[Optional[str], Optional[str]]:
+        """Return a claim's verdict cache key (None when the cache is off) and its cached verdict, if any"""
+        if self.verdict_cache is None or not self.agents_config['fact_checker'].get('cache', True):
+            return None, None
+        key = verdict_key(claim)
+        cached = self.verdict_cache.get(key)
+        attributes["cache_hit"] = cached is not None
+        return key, cached
+
+    def _store_verdict(self, key: Optional[str], response: str) -> str:
+        """Normalize a single-claim response into a verdict line, caching it under key"""
+        verdict = format_verdict(response)
+        if key is not None:
+            self.verdict_cache.set(key, verdict)
+        return verdict
+
+    def _check_claim(self, claim: str) -> str:
+        """Fact-check one claim, serving repeated claims from the verdict cache"""
+        with span("claim_check") as attributes:
+            key, cached = self._cached_verdict(claim, attributes)
+            if cached is not None:
+                return cached
+            # The verdict cache replaces the response cache for single claims
+            return self._store_verdict(key, self._process_with_agent(
+                claim, "fact_checker", use_cache=False, instructions=SINGLE_CLAIM_INSTRUCTIONS
+            ))
+
+    async def _acheck_claim(self, claim: str) -> str:
+        """_check_claim on the event loop, with the verdict cache read and written on threads"""
+        with span("claim_check") as attributes:
+            key, cached = await asyncio.to_thread(self._cached_verdict, claim, attributes)
+            if cached is not None:
+                return cached
+            response = await self._aprocess_with_agent(
+                claim, "fact_checker", use_cache=False, instructions=SINGLE_CLAIM_INSTRUCTIONS
+            )
+            return await asyncio.to_thread(self._store_verdict, key, response)
+
+    @staticmethod
+    def _join_verdicts(verdicts: List[str], on_token: Callable[[str], None] = None) -> str:
+        facts = "\n".join(verdicts)
+        if on_token:
+            on_token(facts)
+        return facts
+
+    def _fact_check_claims(self, claims_text: str, on_token: Callable[[str], None] = None) -> str:
+        """
+        Fact-check each listed claim in parallel and reassemble the verdicts.
+
+        Falls back to checking the whole text in one call when no list items
+        can be found in the claims output.
+        """
+        claims = parse_claims(claims_text)
+        if not claims:
+            return self._process_with_agent(claims_text, "fact_checker", on_token=on_token)
+        return self._join_verdicts(parallel_map(self._check_claim, claims, FACT_CHECK_CONCURRENCY), on_token)
+
+    async def _afact_check_claims(self, claims_text: str, on_token: Callable[[str], None] = None) -> str:
+        """_fact_check_claims on the event loop"""
+        claims = parse_claims(claims_text)
+        if not claims:
+            return await self._aprocess_with_agent(claims_text, "fact_checker", on_token=on_token)
+        return self._join_verdicts(await parallel_map_async(self._acheck_claim, claims, FACT_CHECK_CONCURRENCY),
+                                   on_token)
+
+    def _build_audit_input(self, results: Dict) -> str:
+        """Combine the earlier stage outputs into the content auditor's input"""
+        return f"""
+Summary: {results['summary']}
+
+Action Points: {results['action_points']}
+
+Claims Analysis: {results['claims']}
+
+Fact Check Results: {results['fact_check']}
 """
-            final_output = self._process_with_agent(audit_input, "content_auditor")
-            
-            return {
-                "raw_transcript": transcript,
-                "summary": summary,
-                "action_points": actions,
-                "claims": claims,
-                "fact_check": facts,
-                "final_analysis": final_output
-            }
-            
+
+    def _build_stages(self, transcript: str, emit: Callable[[Dict], None], stream_tokens: bool,
+                      mapped: Dict[str, List[str]] = None, asynchronous: bool = False) -> List[Stage]:
+        """
+        Build the analysis stage graph for a transcript.
+
+        Summary, action points and claims only need the transcript, fact
+        checking waits for claims and the audit waits for everything else.
+        Agents in mapped already have their per-chunk results, so their
+        stages only run the reduce call. With asynchronous, stage functions
+        are coroutines for run_stages_async.
+        """
+        mapped = mapped or {}
+        if asynchronous:
+            process, process_chunked, reduce_partials, fact_check = (
+                self._aprocess_with_agent, self._aprocess_chunked, self._areduce_partials, self._afact_check_claims)
+        else:
+            process, process_chunked, reduce_partials, fact_check = (
+                self._process_with_agent, self._process_chunked, self._reduce_partials, self._fact_check_claims)
+
+        def chunked(agent_type):
+            if agent_type in mapped:
+                return lambda r, t: reduce_partials(mapped[agent_type], agent_type, t)
+            return lambda r, t: process_chunked(transcript, agent_type, t)
+
+        def stage(name, func, depends_on=()):
+            def on_token(text):
+                if text is None:
+                    # The stage's model fell back after streaming: what was streamed is replaced
+                    emit({"type": "stage_reset", "stage": name})
+                else:
+                    emit({"type": "token", "stage": name, "text": text})
+
+            def start():
+                emit({"type": "stage_start", "stage": name})
+                return on_token if stream_tokens else None
+
+            def run(results):
+                on_token = start()
+                with span(f"stage:{name}"):
+                    output = func(results, on_token)
+                emit({"type": "stage_done", "stage": name, "text": output})
+                return output
+
+            async def arun(results):
+                on_token = start()
+                with span(f"stage:{name}"):
+                    output = await func(results, on_token)
+                emit({"type": "stage_done", "stage": name, "text": output})
+                return output
+
+            return Stage(name, arun if asynchronous else run, depends_on)
+
+        return [
+            stage("summary", chunked("summarizer")),
+            stage("action_points", chunked("action_point_specialist")),
+            stage("claims", chunked("claims_analyst")),
+            stage("fact_check",
+                  lambda r, t: fact_check(r["claims"], t),
+                  depends_on=["claims"]),
+            stage("final_analysis",
+                  lambda r, t: process(self._build_audit_input(r), "content_auditor", on_token=t),
+                  depends_on=["summary", "action_points", "claims", "fact_check"]),
+        ]
+
+    @staticmethod
+    def _emit_transcript(transcript: Optional[str], emit: Callable[[Dict], None]):
+        """Fail the analysis on a missing or failed transcription, else report the transcript"""
+        if not transcript or transcript.startswith("Error"):
+            raise Exception(f"Transcription failed: {transcript}")
+        emit({"type": "transcript", "text": transcript})
+
+    @contextmanager
+    def _traced_analysis(self, youtube_url: str):
+        """Trace one analysis and collect its prompt token report, yielding (report, trace)"""
+        report = []
+        report_token = token_report.set(report)
+        try:
+            with start_trace() as trace:
+                with span("analysis", url=youtube_url):
+                    yield report, trace
+        finally:
+            token_report.reset(report_token)
+
+    def _build_result(self, transcript: str, results: Dict, report: List[Dict], trace) -> Dict:
+        return {
+            "raw_transcript": transcript,
+            "summary": results["summary"],
+            "action_points": results["action_points"],
+            "claims": results["claims"],
+            "fact_check": results["fact_check"],
+            "final_analysis": results["final_analysis"],
+            "token_report": summarize_token_report(report),
+            "metrics": trace.summary()
+        }
+
+    def _index_result(self, youtube_url: str, result: Dict):
+        """Record a finished analysis in the analysis index, with its transcript's segment timings"""
+        video_id = extract_video_id(youtube_url)
+        if self.analysis_index is not None and video_id:
+            self.analysis_index.add(video_id, youtube_url, result, get_transcript_timings(video_id))
+
+    def _run_analysis(self, youtube_url: str, emit: Callable[[Dict], None], stream_tokens: bool) -> Dict:
+        """Transcribe and analyze a video, reporting progress through emit"""
+        try:
+            with self._traced_analysis(youtube_url) as (report, trace):
+                # 1. Transcription; Whisper output is mapped by the chunked stages as it arrives
+                mapped = None
+                video_id = extract_video_id(youtube_url)
+                with span("transcription", video_id=video_id) as attributes:
+                    transcript = get_youtube_transcription(youtube_url, allow_whisper=not WHISPER_PIPELINE,
+                                                           attributes=attributes)
+                    if transcript is None and WHISPER_PIPELINE and video_id:
+                        attributes.update(source="whisper", pipelined=True)
+                        transcript, mapped = self._transcribe_and_map(youtube_url)
+                self._emit_transcript(transcript, emit)
+
+                # 2-6. Stages run as soon as their inputs are ready
+                stages = self._build_stages(transcript, emit, stream_tokens, mapped)
+                results = run_stages(stages, max_workers=self.max_concurrency)
+
+            result = self._build_result(transcript, results, report, trace)
+            self._index_result(youtube_url, result)
+            return result
+
+        except Exception as e:
+            raise Exception(f"Analysis failed: {str(e)}")
+
+    async def _arun_analysis(self, youtube_url: str, emit: Callable[[Dict], None], stream_tokens: bool) -> Dict:
+        """
+        _run_analysis on the event loop.
+
+        Caption fetching, tokenizing and the cache and index databases run on
+        threads and Whisper in the worker process pool, so none of them blocks
+        the loop; every LLM call is awaited on it.
+        """
+        try:
+            with self._traced_analysis(youtube_url) as (report, trace):
+                transcript = await asyncio.to_thread(get_youtube_transcription, youtube_url, whisper_in_pool=True)
+                self._emit_transcript(transcript, emit)
+
+                stages = self._build_stages(transcript, emit, stream_tokens, asynchronous=True)
+                results = await run_stages_async(stages, max_concurrency=self.max_concurrency)
+
+            result = self._build_result(transcript, results, report, trace)
+            await asyncio.to_thread(self._index_result, youtube_url, result)
+            return result
+
         except Exception as e:
-            raise Exception(f"Analysis failed: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Analysis failed: {str(e)}")
+
+    def _run_coalesced(self, youtube_url: str, emit: Callable[[Dict], None], stream_tokens: bool) -> Dict:
+        """
+        Run an analysis, or join the one already running for the same video.
+
+        Callers that join an analysis in progress receive its result but none
+        of its progress events.
+        """
+        video_id = extract_video_id(youtube_url) or youtube_url
+        return analysis_flights.do(video_id, self._run_analysis, youtube_url, emit, stream_tokens)
+
+    def analyze_podcast(self, youtube_url: str) -> Dict:
+        """Main function to analyze podcast content"""
+        return self._run_coalesced(youtube_url, emit=lambda event: None, stream_tokens=False)
+
+    async def analyze_podcast_async(self, youtube_url: str, emit: Callable[[Dict], None] = None,
+                                    stream_tokens: bool = False) -> Dict:
+        """
+        Analyze podcast content on the running event loop.
+
+        Progress events (see analyze_podcast_stream) are passed to emit, if
+        given. An analysis of the same video already running, on a thread or
+        on a loop, is joined instead of repeated.
+        """
+        video_id = extract_video_id(youtube_url) or youtube_url
+        return await analysis_flights.ado(video_id, self._arun_analysis, youtube_url,
+                                          emit or (lambda event: None), stream_tokens)
+
+    def analyze_podcast_stream(self, youtube_url: str, stream_tokens: bool = True) -> Iterator[Dict]:
+        """
+        Analyze podcast content, yielding progress events as they happen.
+
+        Events are dicts with a "type" of "transcript", "stage_start", "token",
+        "stage_reset", "stage_done" or "done". "stage_reset" discards the
+        tokens a stage streamed so far, when its model ran out of time and a
+        fallback model answers instead. "done" carries the same result dict
+        that analyze_podcast returns. Failures are re-raised from the generator.
+        """
+        events = queue.Queue()
+        outcome = {}
+
+        def worker():
+            try:
+                outcome["result"] = self._run_coalesced(youtube_url, events.put, stream_tokens)
+            except Exception as e:
+                outcome["error"] = e
+            finally:
+                events.put(None)
+
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(worker,), daemon=True).start()
+
+        while True:
+            event = events.get()
+            if event is None:
+                break
+            yield event
+
+        if "error" in outcome:
+            raise outcome["error"]
+        yield {"type": "done", "result": outcome["result"]}
@@ -0,0 +1,206 @@
+# ===============================
+# File: analysis_index.py
+# ===============================
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from fact_check import parse_claims
+from config import ANALYSIS_INDEX_PATH
+
+# Stage outputs kept per video, in result order
+STAGE_FIELDS = ("summary", "action_points", "claims", "fact_check", "final_analysis")
+
+_TERM = re.compile(r"\w+")
+
+
+def _match_query(text: str, any_term: bool = False) -> str:
+    """Quote each word of free text for FTS5; words are all required unless any_term"""
+    terms = [f'"{term}"' for term in _TERM.findall(text)]
+    return (" OR " if any_term else " ").join(terms)
+
+
+def timestamp_url(video_id: str, seconds: float) -> str:
+    return f"https://youtu.be/{video_id}?t={int(seconds)}"
+
+
+class AnalysisIndex:
+    """
+    SQLite record of finished analyses, searchable across videos.
+
+    Each video keeps its latest analysis: every stage output and the
+    transcript, with its segment timings packed into two arrays (start
+    seconds as float32, character offsets as uint32). One FTS5 table
+    indexes the transcript and stage outputs and another the individual
+    claims with their verdicts, so "have we checked this already?" is a
+    query rather than a new pipeline run.
+    """
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS analyses (
+                       video_id TEXT PRIMARY KEY,
+                       url TEXT NOT NULL,
+                       transcript TEXT NOT NULL,
+                       segment_starts BLOB,
+                       segment_offsets BLOB,
+                       summary TEXT,
+                       action_points TEXT,
+                       claims TEXT,
+                       fact_check TEXT,
+                       final_analysis TEXT,
+                       metrics TEXT,
+                       analyzed_at REAL NOT NULL
+                   )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS analyses_time ON analyses (analyzed_at)")
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS analysis_text "
+                "USING fts5(video_id UNINDEXED, field UNINDEXED, body, tokenize='porter unicode61')"
+            )
+            self._conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS claim_text "
+                "USING fts5(video_id UNINDEXED, claim, verdict UNINDEXED, tokenize='porter unicode61')"
+            )
+
+    def add(self, video_id: str, url: str, result: Dict, timings: Dict = None):
+        """Index an analyze_podcast result, replacing any earlier analysis of the video"""
+        starts = offsets = None
+        if timings and timings.get("starts"):
+            starts = np.asarray(timings["starts"], dtype=np.float32).tobytes()
+            offsets = np.asarray(timings["offsets"], dtype=np.uint32).tobytes()
+
+        # Verdicts are one "- ..." line per claim, in claim order, when the claims could be parsed
+        claims = parse_claims(result["claims"])
+        verdicts = [line for line in result["fact_check"].splitlines() if line.startswith("- ")]
+        if len(verdicts) != len(claims):
+            verdicts = [None] * len(claims)
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO analyses (video_id, url, transcript, segment_starts, segment_offsets, "
+                f"{', '.join(STAGE_FIELDS)}, metrics, analyzed_at) VALUES ({', '.join('?' * 12)})",
+                (video_id, url, result["raw_transcript"], starts, offsets,
+                 *(result[field] for field in STAGE_FIELDS),
+                 json.dumps(result.get("metrics"), default=str), time.time())
+            )
+            self._conn.execute("DELETE FROM analysis_text WHERE video_id = ?", (video_id,))
+            self._conn.execute("DELETE FROM claim_text WHERE video_id = ?", (video_id,))
+            self._conn.executemany(
+                "INSERT INTO analysis_text (video_id, field, body) VALUES (?, ?, ?)",
+                [(video_id, field, result[field]) for field in ("raw_transcript",) + STAGE_FIELDS]
+            )
+            self._conn.executemany(
+                "INSERT INTO claim_text (video_id, claim, verdict) VALUES (?, ?, ?)",
+                [(video_id, claim, verdict) for claim, verdict in zip(claims, verdicts)]
+            )
+
+    def get(self, video_id: str) -> Optional[Dict]:
+        """Return a video's stored analysis in the shape analyze_podcast returns, plus url and analyzed_at"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT url, transcript, {', '.join(STAGE_FIELDS)}, metrics, analyzed_at "
+                "FROM analyses WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "video_id": video_id, "url": row[0], "raw_transcript": row[1],
+            **dict(zip(STAGE_FIELDS, row[2:7])),
+            "metrics": json.loads(row[7]) if row[7] else None, "analyzed_at": row[8]
+        }
+
+    def search(self, query: str, limit: int = 20) -> List[Dict]:
+        """Best matches for all words of query across transcripts and stage outputs"""
+        match = _match_query(query)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.video_id, a.url, t.field, snippet(analysis_text, 2, '**', '**', '…', 16) "
+                "FROM analysis_text t JOIN analyses a ON a.video_id = t.video_id "
+                "WHERE analysis_text MATCH ? ORDER BY t.rank LIMIT ?", (match, limit)
+            ).fetchall()
+        return [{"video_id": row[0], "url": row[1], "field": row[2], "snippet": row[3]} for row in rows]
+
+    def find_claims(self, claim: str, limit: int = 5) -> List[Dict]:
+        """Previously analyzed claims ranked by similarity to claim, with their verdicts"""
+        match = _match_query(claim, any_term=True)
+        if not match:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT c.video_id, a.url, c.claim, c.verdict, a.analyzed_at "
+                "FROM claim_text c JOIN analyses a ON a.video_id = c.video_id "
+                "WHERE claim_text MATCH ? ORDER BY c.rank LIMIT ?", (match, limit)
+            ).fetchall()
+        return [
+            {"video_id": row[0], "url": row[1], "claim": row[2], "verdict": row[3], "analyzed_at": row[4]}
+            for row in rows
+        ]
+
+    def timestamps(self, video_id: str, phrase: str, limit: int = 20) -> List[Dict]:
+        """
+        Where phrase is said in a video: the start of the transcript segment
+        of each match (case-insensitive), with a link that jumps to it.
+
+        Empty when the video is unknown or its transcript has no timings.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT transcript, segment_starts, segment_offsets FROM analyses WHERE video_id = ?",
+                (video_id,)
+            ).fetchone()
+        if row is None or row[1] is None or not phrase.strip():
+            return []
+
+        transcript = row[0]
+        starts = np.frombuffer(row[1], dtype=np.float32)
+        offsets = np.frombuffer(row[2], dtype=np.uint32)
+        positions = [m.start() for m in re.finditer(re.escape(phrase.strip()), transcript, re.IGNORECASE)]
+        if not positions:
+            return []
+
+        segments = np.searchsorted(offsets, positions[:limit], side="right") - 1
+        matches = []
+        for position, segment in zip(positions, segments):
+            seconds = float(starts[max(segment, 0)])
+            matches.append({
+                "seconds": round(seconds, 2),
+                "text": transcript[max(0, position - 60):position + len(phrase) + 60],
+                "url": timestamp_url(video_id, seconds),
+            })
+        return matches
+
+    def recent(self, limit: int = 20) -> List[Dict]:
+        """Most recently analyzed videos"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT video_id, url, summary, analyzed_at FROM analyses ORDER BY analyzed_at DESC LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [{"video_id": row[0], "url": row[1], "summary": row[2], "analyzed_at": row[3]} for row in rows]
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def get_analysis_index() -> Optional[AnalysisIndex]:
+    """Return the process-wide analysis index configured in config.py (None when disabled)"""
+    global _default_index
+    with _default_index_lock:
+        if _default_index is None and ANALYSIS_INDEX_PATH:
+            _default_index = AnalysisIndex(ANALYSIS_INDEX_PATH)
+        return _default_index
@@ -0,0 +1,270 @@
+# ===============================
+# File: api.py
+# ===============================
+"""
+HTTP API for video analysis.
+
+Analyses run as asyncio tasks on the server's event loop: LLM calls are
+awaited with ainvoke / astream, captions are fetched on a thread and
+Whisper runs in the worker process pool, so one replica serves many
+analyses at once. Jobs and their progress events are recorded in a
+JobStore of their own (API_JOBS_DB_PATH); replicas that share that
+database file share its jobs.
+
+Run with:
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Endpoints:
+    POST /analyses                 {"url": ...} -> {"id", "state"}
+    GET  /analyses/{id}            state and per-stage progress
+    GET  /analyses/{id}/result     the analysis result once done
+    GET  /analyses/{id}/events     progress as server-sent events
+
+    GET  /videos/search?q=...            keyword search over past analyses
+    GET  /videos/claims?q=...            past claims like the given one, with verdicts
+    GET  /videos/{video_id}              the latest stored analysis of a video
+    GET  /videos/{video_id}/timestamps?q=...  where a phrase is said, with jump links
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, List
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from agents import PodcastAnalyzer
+from analysis_index import AnalysisIndex
+from jobs import JobStore, track_stage, RUNNING, DONE, FAILED
+from utils import extract_video_id
+from config import OPENAI_API_KEY, PPLX_API_KEY, API_JOBS_DB_PATH, JOB_RETENTION, API_MAX_CONCURRENT_ANALYSES
+
+
+class AnalysisRequest(BaseModel):
+    url: str
+
+
+class _Run:
+    """Events of an analysis running on this server, for replay to event-stream clients"""
+
+    def __init__(self):
+        self.events = []
+        self.changed = asyncio.Event()
+
+    def add(self, event: Dict):
+        self.events.append(event)
+        self.changed.set()
+
+
+class AnalysisService:
+    """
+    Runs analyses on the event loop and records them in a JobStore.
+
+    Replicas that share the job database share the work: a video already
+    being analyzed by any of them is joined rather than started again, and
+    every replica can stream any job's progress. Events of a job running
+    elsewhere come from the store, without the token-by-token text.
+    """
+
+    def __init__(self, analyzer: PodcastAnalyzer, store: JobStore, max_concurrent: int):
+        self.analyzer = analyzer
+        self.store = store
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        self._runs = {}
+        self._tasks = set()
+        # Submissions in progress per video, joined by concurrent requests for the same video
+        self._claims = {}
+
+    async def submit(self, url: str) -> str:
+        """Start an analysis, or return the one already running for the video"""
+        video_id = extract_video_id(url) or url
+        claim = self._claims.get(video_id)
+        if claim is None:
+            claim = asyncio.ensure_future(self._claim(url, video_id))
+            self._claims[video_id] = claim
+            claim.add_done_callback(lambda _: self._claims.pop(video_id, None))
+        # A disconnecting client does not cancel a claim others may be waiting on
+        return await asyncio.shield(claim)
+
+    async def _claim(self, url: str, video_id: str) -> str:
+        # The store's claim is atomic across replicas sharing the database
+        job_id, created = await asyncio.to_thread(self.store.claim, url, video_id)
+        if not created:
+            return job_id
+
+        self._runs[job_id] = _Run()
+        task = asyncio.create_task(self._run(job_id, url))
+        # The loop only keeps weak references to tasks
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job_id
+
+    async def _record(self, job_id: str, events: asyncio.Queue):
+        """Write a run's progress to the store, off the loop and in order, until a None arrives"""
+        stages = {}
+        while True:
+            event = await events.get()
+            if event is None:
+                return stages
+            await asyncio.to_thread(self.store.add_event, job_id, event)
+            if track_stage(stages, event):
+                await asyncio.to_thread(self.store.update, job_id, stages=dict(stages))
+
+    async def _run(self, job_id: str, url: str):
+        run = self._runs[job_id]
+        pending = asyncio.Queue()
+        recorder = asyncio.create_task(self._record(job_id, pending))
+
+        def emit(event: Dict):
+            run.add(event)
+            # Tokens (and resets of them) are only streamed from this replica
+            if event["type"] not in ("token", "stage_reset"):
+                pending.put_nowait(event)
+
+        try:
+            async with self._semaphore:
+                await asyncio.to_thread(self.store.update, job_id, state=RUNNING)
+                result = await self.analyzer.analyze_podcast_async(url, emit, stream_tokens=True)
+            pending.put_nowait(None)
+            stages = await recorder
+            await asyncio.to_thread(self.store.update, job_id, state=DONE, stages=stages, result=result)
+            run.add({"type": "done", "result": result})
+        except Exception as e:
+            pending.put_nowait(None)
+            stages = await recorder
+            await asyncio.to_thread(self.store.update, job_id, state=FAILED, stages=stages, error=str(e))
+            run.add({"type": "error", "error": str(e)})
+        finally:
+            del self._runs[job_id]
+
+    async def events(self, job_id: str, interval: float = 0.5) -> AsyncIterator[Dict]:
+        """
+        Yield a job's events from the start, then live until it finishes.
+
+        A job running on another replica is followed through the store.
+        """
+        run = self._runs.get(job_id)
+        if run is not None:
+            sent = 0
+            while True:
+                while sent < len(run.events):
+                    event = run.events[sent]
+                    sent += 1
+                    yield event
+                    if event["type"] in ("done", "error"):
+                        return
+                run.changed.clear()
+                if sent == len(run.events):
+                    await run.changed.wait()
+
+        seq = 0
+        while True:
+            # Events first: a job's events are dropped once it finishes, and its result carries them all
+            for seq, event in await asyncio.to_thread(self.store.events_since, job_id, seq):
+                yield event
+            job = await asyncio.to_thread(self.store.get, job_id)
+            if job is None:
+                yield {"type": "error", "error": f"Unknown analysis: {job_id}"}
+                return
+            if job["state"] == DONE:
+                yield {"type": "done", "result": job["result"]}
+                return
+            if job["state"] == FAILED:
+                yield {"type": "error", "error": job["error"]}
+                return
+            await asyncio.sleep(interval)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.service = AnalysisService(
+        PodcastAnalyzer(OPENAI_API_KEY, PPLX_API_KEY),
+        JobStore(API_JOBS_DB_PATH, retention_seconds=JOB_RETENTION),
+        API_MAX_CONCURRENT_ANALYSES
+    )
+    yield
+
+
+app = FastAPI(title="Video Fact Finder API", lifespan=lifespan)
+
+
+# Endpoints that only read the store are plain functions, run on FastAPI's thread pool
+def _get_job(job_id: str) -> Dict:
+    job = app.state.service.store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown analysis: {job_id}")
+    return job
+
+
+@app.post("/analyses", status_code=202)
+async def submit_analysis(request: AnalysisRequest) -> Dict:
+    if not extract_video_id(request.url):
+        raise HTTPException(status_code=422, detail="Not a YouTube video URL")
+    job_id = await app.state.service.submit(request.url)
+    job = await asyncio.to_thread(_get_job, job_id)
+    return {"id": job_id, "state": job["state"]}
+
+
+@app.get("/analyses/{job_id}")
+def analysis_status(job_id: str) -> Dict:
+    job = _get_job(job_id)
+    return {key: job[key] for key in ("id", "url", "video_id", "state", "stages", "error",
+                                      "created_at", "updated_at")}
+
+
+@app.get("/analyses/{job_id}/result")
+def analysis_result(job_id: str) -> Dict:
+    job = _get_job(job_id)
+    if job["state"] == FAILED:
+        raise HTTPException(status_code=500, detail=job["error"])
+    if job["state"] != DONE:
+        raise HTTPException(status_code=409, detail=f"Analysis is {job['state']}")
+    return job["result"]
+
+
+@app.get("/analyses/{job_id}/events")
+async def analysis_events(job_id: str) -> StreamingResponse:
+    await asyncio.to_thread(_get_job, job_id)
+
+    async def stream():
+        async for event in app.state.service.events(job_id):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def _get_index() -> AnalysisIndex:
+    index = app.state.service.analyzer.analysis_index
+    if index is None:
+        raise HTTPException(status_code=404, detail="The analysis index is disabled")
+    return index
+
+
+# Index lookups are plain SQLite queries too
+@app.get("/videos/search")
+def search_videos(q: str, limit: int = 20) -> List[Dict]:
+    return _get_index().search(q, limit)
+
+
+@app.get("/videos/claims")
+def search_claims(q: str, limit: int = 5) -> List[Dict]:
+    return _get_index().find_claims(q, limit)
+
+
+@app.get("/videos/{video_id}")
+def video_analysis(video_id: str) -> Dict:
+    analysis = _get_index().get(video_id)
+    if analysis is None:
+        raise HTTPException(status_code=404, detail=f"No analysis of video {video_id}")
+    return analysis
+
+
+@app.get("/videos/{video_id}/timestamps")
+def video_timestamps(video_id: str, q: str, limit: int = 20) -> List[Dict]:
+    return _get_index().timestamps(video_id, q, limit)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,144 @@
+# ===============================
+# File: batch.py
+# ===============================
+"""
+Analyze many videos without the Streamlit UI.
+
+Usage:
+    python batch.py urls.txt --output results.jsonl --concurrency 4
+    python batch.py "https://www.youtube.com/playlist?list=..." --output results.jsonl
+
+Each completed video is appended to the output file as one JSON record holding
+the analysis result plus its `video_id` and `url`. Videos already present in
+the output file are skipped, so an interrupted run can simply be restarted.
+"""
+import argparse
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List
+from agents import PodcastAnalyzer
+from utils import extract_video_id
+from rate_limit import priority, BATCH
+from config import OPENAI_API_KEY, PPLX_API_KEY
+
+
+def expand_playlist(url: str) -> List[str]:
+    """List the video URLs of a YouTube playlist without downloading anything"""
+    import yt_dlp
+
+    with yt_dlp.YoutubeDL({'extract_flat': True, 'quiet': True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    return [f"https://www.youtube.com/watch?v={entry['id']}" for entry in info.get('entries') or []
+            if entry and entry.get('id')]
+
+
+def read_urls(source: str) -> List[str]:
+    """Read URLs from a playlist URL or from a file with one URL per line"""
+    if source.startswith(("http://", "https://")):
+        if "list=" in source:
+            return expand_playlist(source)
+        return [source]
+
+    with open(source, 'r') as f:
+        return [line.strip() for line in f if line.strip() and not line.lstrip().startswith('#')]
+
+
+def load_completed(output_path: str) -> set:
+    """Collect the video IDs already written to the output file"""
+    completed = set()
+    try:
+        with open(output_path, 'r') as f:
+            for line in f:
+                try:
+                    completed.add(json.loads(line)["video_id"])
+                except (ValueError, KeyError):
+                    # A partial last line from an interrupted run is retried
+                    continue
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def _terminate_partial_line(output_path: str):
+    """End a half-written last record so new records start on their own line"""
+    try:
+        with open(output_path, 'rb+') as f:
+            f.seek(0, 2)
+            if f.tell() == 0:
+                return
+            f.seek(-1, 2)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+    except FileNotFoundError:
+        pass
+
+
+def _analyze_as_batch(analyzer: PodcastAnalyzer, url: str) -> dict:
+    """Analyze one video at batch priority, so interactive sessions are served first"""
+    with priority(BATCH):
+        return analyzer.analyze_podcast(url)
+
+
+def run_batch(urls: List[str], output_path: str, concurrency: int, analyzer: PodcastAnalyzer) -> dict:
+    """Analyze urls concurrently, appending each success to output_path as it finishes"""
+    completed = load_completed(output_path)
+
+    # One job per video, skipping invalid URLs, duplicates and finished videos
+    jobs = {}
+    for url in urls:
+        video_id = extract_video_id(url)
+        if not video_id:
+            print(f"Skipping invalid URL: {url}", file=sys.stderr)
+        elif video_id not in completed and video_id not in jobs:
+            jobs[video_id] = url
+
+    stats = {"skipped": len(completed & {extract_video_id(url) for url in urls}), "done": 0, "failed": 0}
+    print(f"{len(jobs)} videos to analyze, {stats['skipped']} already done", file=sys.stderr)
+
+    write_lock = threading.Lock()
+    _terminate_partial_line(output_path)
+    with open(output_path, 'a') as out, ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(_analyze_as_batch, analyzer, url): (video_id, url)
+                   for video_id, url in jobs.items()}
+        for future in as_completed(futures):
+            video_id, url = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"[failed] {video_id}: {e}", file=sys.stderr)
+                continue
+
+            record = {"video_id": video_id, "url": url, **result}
+            with write_lock:
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+            stats["done"] += 1
+            print(f"[{stats['done'] + stats['failed']}/{len(jobs)}] {video_id} done", file=sys.stderr)
+
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="File with one YouTube URL per line, or a playlist URL")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file to append results to")
+    parser.add_argument("--concurrency", type=int, default=4, help="Videos analyzed at the same time")
+    args = parser.parse_args()
+
+    if not OPENAI_API_KEY or not PPLX_API_KEY:
+        parser.error("OPENAI_API_KEY and PPLX_API_KEY must be set in the environment or .env file")
+
+    start_time = time.time()
+    analyzer = PodcastAnalyzer(OPENAI_API_KEY, PPLX_API_KEY)
+    stats = run_batch(read_urls(args.source), args.output, args.concurrency, analyzer)
+    print(f"Finished in {time.time() - start_time:.1f}s: {stats['done']} done, "
+          f"{stats['failed']} failed, {stats['skipped']} skipped", file=sys.stderr)
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# ===============================
+# File: benchmarks/bench_pipeline.py
+# ===============================
+"""
+Offline benchmark of the analysis pipeline with stubbed LLMs and captions.
+
+Runs PodcastAnalyzer.analyze_podcast (and optionally PodcastCrew.kickoff)
+over 1, 10 and 100 synthetic videos and reports p50/p95 latency per video,
+throughput and peak RSS. No OpenAI, Perplexity or YouTube calls are made.
+
+Usage (from the repository root):
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --videos 1,10 --latency 0.5 --token-rate 80 --crew
+    python benchmarks/bench_pipeline.py --videos 1 --whisper
+    python benchmarks/bench_pipeline.py --videos 10 --rate-limits
+"""
+import argparse
+import os
+import resource
+import sys
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+# Measure the pipeline itself: no response or verdict cache, a throwaway transcript cache,
+# and no stub videos written to the analysis index the app searches
+os.environ["LLM_CACHE_BACKEND"] = "none"
+os.environ["FACT_CHECK_CACHE_PATH"] = ""
+os.environ["ANALYSIS_INDEX_PATH"] = ""
+os.environ["TRANSCRIPT_CACHE_DIR"] = tempfile.mkdtemp(prefix="bench-transcripts-")
+os.environ.setdefault("OPENAI_API_KEY", "stub")
+os.environ.setdefault("PPLX_API_KEY", "stub")
+
+from stubs import (StubTranscriptApi, make_stub_model_factory, make_stub_crew_llm_factory,
+                   write_audio_fixture)
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def run_scenario(name: str, func, videos: int, concurrency: int):
+    """Run func once per synthetic video on a thread pool and print latency statistics"""
+    urls = [f"https://www.youtube.com/watch?v=bench{uuid.uuid4().hex[:11]}" for _ in range(videos)]
+
+    def timed(url):
+        start = time.perf_counter()
+        func(url)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, videos))) as executor:
+        latencies = list(executor.map(timed, urls))
+    wall = time.perf_counter() - start
+
+    print(f"{name:<10}{videos:>8}{percentile(latencies, 50):>10.2f}{percentile(latencies, 95):>10.2f}"
+          f"{videos / wall:>14.2f}{wall:>10.1f}{peak_rss_mb():>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", default="1,10,100", help="Comma-separated video counts")
+    parser.add_argument("--concurrency", type=int, default=10, help="Videos analyzed at the same time")
+    parser.add_argument("--latency", type=float, default=1.0, help="Stub time to first token, seconds")
+    parser.add_argument("--token-rate", type=float, default=50.0, help="Stub output tokens per second")
+    parser.add_argument("--transcript-words", type=int, default=3000, help="Words per stub transcript")
+    parser.add_argument("--crew", action="store_true", help="Also benchmark PodcastCrew.kickoff")
+    parser.add_argument("--whisper", action="store_true",
+                        help="Disable captions so transcription runs Whisper on a synthetic audio fixture")
+    parser.add_argument("--rate-limits", action="store_true",
+                        help="Keep the configured *_RPM/*_TPM limits, so time spent waiting on them is measured too")
+    args = parser.parse_args()
+
+    # Stub calls are not billed: by default lift the token buckets so they do not hold requests back
+    if not args.rate_limits:
+        for limit in ("OPENAI_RPM", "OPENAI_TPM", "PPLX_RPM", "PPLX_TPM"):
+            os.environ[limit] = "1e9"
+
+    import agents
+    import langchain_openai
+    import langchain_community.chat_models
+    import utils
+
+    StubTranscriptApi.words_per_video = args.transcript_words
+    utils.YouTubeTranscriptApi = StubTranscriptApi
+    # clients.py imports the provider classes when it first builds a client
+    langchain_openai.ChatOpenAI = make_stub_model_factory(args.latency, args.token_rate)
+    langchain_community.chat_models.ChatPerplexity = make_stub_model_factory(args.latency, args.token_rate)
+
+    if args.whisper:
+        import whisper
+        import transcription
+
+        StubTranscriptApi.captions = False
+        fixture = write_audio_fixture(os.path.join(tempfile.mkdtemp(prefix="bench-audio-"), "fixture.wav"))
+        transcription.load_audio_stream = lambda url: whisper.load_audio(fixture)
+        # The pipelined path (WHISPER_PIPELINE) streams the decode instead
+        transcription._decode_command = lambda url, sample_rate: [
+            "ffmpeg", "-nostdin", "-loglevel", "error", "-i", fixture,
+            "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le", "-ar", str(sample_rate), "-"
+        ]
+
+    analyzer = agents.PodcastAnalyzer("stub", "stub")
+    counts = [int(count) for count in args.videos.split(",") if count.strip()]
+
+    print(f"Stub LLM: {args.latency}s to first token, {args.token_rate} tokens/s; "
+          f"concurrency {args.concurrency}; transcription: {'whisper' if args.whisper else 'captions'}; "
+          f"rate limits: {'configured' if args.rate_limits else 'lifted'}\n")
+    print(f"{'scenario':<10}{'videos':>8}{'p50 s':>10}{'p95 s':>10}{'videos/s':>14}{'wall s':>10}{'peak MB':>12}")
+
+    for videos in counts:
+        run_scenario("analyzer", analyzer.analyze_podcast, videos, args.concurrency)
+
+    if args.crew:
+        import podcast_crew
+
+        podcast_crew.RateLimitedLLM = make_stub_crew_llm_factory(args.latency, args.token_rate)
+
+        # Crew tasks hold their outputs, so every run gets its own crew
+        kickoff = lambda url: podcast_crew.PodcastCrew().kickoff(inputs={"youtube_url": url})
+        for videos in counts:
+            run_scenario("crew", kickoff, videos, args.concurrency)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+# ===============================
+# File: benchmarks/bench_startup.py
+# ===============================
+"""
+Cold-start benchmark: import time and baseline memory of the entry points.
+
+Each module is imported in a fresh interpreter, several times, and the
+median import time, resident memory after the import and the heavy
+dependencies that came with it (torch, whisper, yt_dlp, crewai, the
+LangChain provider SDKs) are reported. A bare interpreter is measured
+first as the baseline.
+
+Usage (from the repository root):
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --modules main,batch --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ("torch", "whisper", "yt_dlp", "crewai", "langchain_openai", "langchain_community")
+
+# Run in the child interpreter; prints one JSON line
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+if {module!r}:
+    __import__({module!r})
+seconds = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"seconds": seconds, "rss_mb": rss_mb, "heavy": heavy}}))
+"""
+
+
+def probe(module: str) -> dict:
+    """Import module in a new interpreter and return its timing, memory and heavy imports"""
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modules", default="main,batch,agents,podcast_crew",
+                        help="Comma-separated modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    args = parser.parse_args()
+
+    print(f"{'module':<16}{'import s':>10}{'RSS MB':>10}  heavy dependencies loaded")
+    for module in [""] + [name.strip() for name in args.modules.split(",") if name.strip()]:
+        try:
+            runs = [probe(module) for _ in range(max(1, args.runs))]
+        except subprocess.CalledProcessError as e:
+            error = (e.stderr.strip().splitlines() or ["import failed"])[-1]
+            print(f"{module:<16}  failed: {error}")
+            continue
+
+        seconds = statistics.median(run["seconds"] for run in runs)
+        rss_mb = statistics.median(run["rss_mb"] for run in runs)
+        print(f"{module or '(python)':<16}{seconds:>10.2f}{rss_mb:>10.1f}  {', '.join(runs[-1]['heavy']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# ===============================
+# File: benchmarks/bench_whisper_chunked.py
+# ===============================
+"""
+Compare single-call Whisper transcription against the chunked process-pool mode.
+
+Usage (from the repository root):
+    python benchmarks/bench_whisper_chunked.py path/to/audio.mp3 --workers 1,2,4,8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import whisper
+from transcription import transcribe_audio, transcribe_chunked, _get_pool, find_segments
+from config import WHISPER_MODEL, WHISPER_CHUNK_SECONDS
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("audio", help="Audio file to transcribe")
+    parser.add_argument("--model", default=WHISPER_MODEL, help="Whisper model name")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker counts to try")
+    parser.add_argument("--chunk-seconds", type=float, default=WHISPER_CHUNK_SECONDS)
+    args = parser.parse_args()
+
+    audio = whisper.load_audio(args.audio)
+    duration = len(audio) / whisper.audio.SAMPLE_RATE
+    segments = find_segments(audio, chunk_seconds=args.chunk_seconds)
+    print(f"Audio: {duration:.1f}s, {len(segments)} segments of ~{args.chunk_seconds:.0f}s, model '{args.model}'")
+
+    # Warm the in-process model so the baseline excludes load time, like the pools below
+    transcribe_audio(audio[:whisper.audio.SAMPLE_RATE], args.model)
+    baseline, baseline_time = _timed(transcribe_audio, audio, args.model)
+    baseline_words = len(baseline["text"].split())
+
+    print(f"\n{'mode':<16}{'seconds':>10}{'speed-up':>10}{'x realtime':>12}{'words':>8}")
+    print(f"{'single call':<16}{baseline_time:>10.1f}{1.0:>10.2f}{duration / baseline_time:>12.1f}{baseline_words:>8}")
+
+    for workers in [int(w) for w in args.workers.split(",") if w.strip()]:
+        # Start the pool and load a model in every worker before timing
+        pool = _get_pool(args.model, workers)
+        list(pool.map(abs, range(workers)))
+        text, elapsed = _timed(transcribe_chunked, audio, args.model, workers, args.chunk_seconds)
+        label = f"chunked x{workers}"
+        print(f"{label:<16}{elapsed:>10.1f}{baseline_time / elapsed:>10.2f}"
+              f"{duration / elapsed:>12.1f}{len(text.split()):>8}")
+
+
+if __name__ == "__main__":
+    main()
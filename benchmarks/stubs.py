@@ -0,0 +1,157 @@
+# ===============================
+# File: benchmarks/stubs.py
+# ===============================
+"""
+Offline stand-ins for the external services the pipeline calls.
+
+StubChatModel mimics ChatOpenAI / ChatPerplexity (invoke, stream, ainvoke,
+astream) with a configurable first-token latency and output token rate.
+StubTranscriptApi mimics YouTubeTranscriptApi with generated captions.
+write_audio_fixture writes a short synthetic audio file for the Whisper path.
+"""
+import asyncio
+import math
+import random
+import struct
+import time
+import types
+import wave
+import zlib
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+WORDS = ("the study shows that people who sleep eight hours a night are more productive "
+         "and this claim is often repeated but rarely backed by solid evidence").split()
+
+
+def _words(count: int, seed=0) -> list:
+    """Filler words drawn from WORDS; equal seeds give equal text, different seeds different text"""
+    rng = random.Random(seed)
+    return [rng.choice(WORDS) for _ in range(count)]
+
+
+class StubChatModel:
+    """Chat model that waits like a real provider and answers with filler text"""
+
+    def __init__(self, model: str = "gpt-4", latency: float = 1.0, token_rate: float = 50.0,
+                 completion_tokens: int = 120, temperature: float = 0.2, **kwargs):
+        self.model_name = model
+        self.model = model
+        self.temperature = temperature
+        self.latency = latency
+        self.token_rate = token_rate
+        self.completion_tokens = completion_tokens
+
+    def _prompt_tokens(self, messages) -> int:
+        return sum(len(message["content"].split()) for message in messages)
+
+    def _usage(self, messages) -> dict:
+        prompt_tokens = self._prompt_tokens(messages)
+        return {"input_tokens": prompt_tokens, "output_tokens": self.completion_tokens,
+                "total_tokens": prompt_tokens + self.completion_tokens}
+
+    def _text(self, messages) -> str:
+        # Fact-check style lines so downstream formatting code has realistic input
+        # Seeded by the prompt, so distinct calls never return identical (coalescable) text
+        seed = zlib.crc32("".join(message["content"] for message in messages).encode("utf-8"))
+        words = _words(self.completion_tokens, seed)
+        lines = [" ".join(words[i:i + 12]) for i in range(0, len(words), 12)]
+        return "\n".join(f"{i}. ⚠️ {line}" for i, line in enumerate(lines, 1))
+
+    def invoke(self, messages, **kwargs):
+        time.sleep(self.latency + self.completion_tokens / self.token_rate)
+        return AIMessage(content=self._text(messages), usage_metadata=self._usage(messages))
+
+    def stream(self, messages, **kwargs):
+        time.sleep(self.latency)
+        words = self._text(messages).split(" ")
+        for i, word in enumerate(words):
+            time.sleep(1 / self.token_rate)
+            last = i == len(words) - 1
+            yield AIMessageChunk(content=word + ("" if last else " "),
+                                 usage_metadata=self._usage(messages) if last else None)
+
+    async def ainvoke(self, messages, **kwargs):
+        await asyncio.sleep(self.latency + self.completion_tokens / self.token_rate)
+        return AIMessage(content=self._text(messages), usage_metadata=self._usage(messages))
+
+    async def astream(self, messages, **kwargs):
+        await asyncio.sleep(self.latency)
+        words = self._text(messages).split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(1 / self.token_rate)
+            last = i == len(words) - 1
+            yield AIMessageChunk(content=word + ("" if last else " "),
+                                 usage_metadata=self._usage(messages) if last else None)
+
+
+def make_stub_model_factory(latency: float, token_rate: float, completion_tokens: int = 120):
+    """Return a drop-in replacement for the ChatOpenAI / ChatPerplexity constructors"""
+    def factory(*args, model: str = "stub", temperature: float = 0.2, **kwargs):
+        return StubChatModel(model=model, latency=latency, token_rate=token_rate,
+                             completion_tokens=completion_tokens, temperature=temperature)
+    return factory
+
+
+def make_stub_crew_llm_factory(latency: float, token_rate: float, completion_tokens: int = 120):
+    """
+    Return a replacement for the LLM constructor PodcastCrew uses.
+
+    CrewAI keeps instances of its own LLM class as-is, so the stub subclasses
+    it and answers in the ReAct format its agents parse.
+    """
+    from crewai import LLM
+
+    class StubCrewLLM(LLM):
+        def call(self, messages, callbacks=None):
+            time.sleep(latency + completion_tokens / token_rate)
+            text = " ".join(_words(completion_tokens, len(messages)))
+            return f"Thought: I now know the final answer\nFinal Answer: {text}"
+
+    def factory(*args, model: str = "stub", **kwargs):
+        return StubCrewLLM(model=model)
+    return factory
+
+
+class StubTranscriptApi:
+    """
+    YouTubeTranscriptApi replacement serving generated manual captions, or none at all.
+
+    Captions are seeded by video ID, so every video gets its own transcript
+    and its LLM calls are not coalesced with another video's.
+    """
+
+    words_per_video = 3000
+    captions = True
+
+    @classmethod
+    def list_transcripts(cls, video_id: str):
+        if not cls.captions:
+            return []
+        segments = [
+            {"text": " ".join(_words(10, f"{video_id}:{i}")), "start": i * 3.0, "duration": 3.0}
+            for i in range(cls.words_per_video // 10)
+        ]
+        return [types.SimpleNamespace(is_generated=False, language_code="en", fetch=lambda: segments)]
+
+
+def write_audio_fixture(path: str, seconds: float = 20.0, sample_rate: int = 16000):
+    """
+    Write a mono 16-bit WAV of tone bursts separated by silences.
+
+    It exercises decoding, silence splitting and the Whisper worker pool
+    without network access; the transcript itself is meaningless.
+    """
+    frames = bytearray()
+    for n in range(int(seconds * sample_rate)):
+        t = n / sample_rate
+        # 2.5 s of sound, then 0.5 s of silence
+        amplitude = 0.3 if (t % 3.0) < 2.5 else 0.0
+        sample = amplitude * math.sin(2 * math.pi * 220 * t) * (0.6 + 0.4 * math.sin(2 * math.pi * 3 * t))
+        frames += struct.pack("<h", int(sample * 32767))
+
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(bytes(frames))
+    return path
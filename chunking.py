@@ -0,0 +1,44 @@
+# ===============================
+# File: chunking.py
+# ===============================
+from functools import lru_cache
+from typing import List
+import tiktoken
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model_name: str = "gpt-4"):
+    """Return the tokenizer for a model, falling back to cl100k_base for unknown models"""
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+
+def count_tokens(text: str, model_name: str = "gpt-4") -> int:
+    """Count the tokens in text as seen by the given model"""
+    return len(get_encoding(model_name).encode(text))
+
+
+def split_by_tokens(text: str, max_tokens: int, overlap: int = 0, model_name: str = "gpt-4") -> List[str]:
+    """
+    Split text into chunks of at most max_tokens tokens.
+
+    Consecutive chunks share `overlap` tokens so statements that straddle a
+    boundary are seen whole by at least one chunk.
+    """
+    if overlap >= max_tokens:
+        raise ValueError("Chunk overlap must be smaller than the chunk size")
+
+    encoding = get_encoding(model_name)
+    tokens = encoding.encode(text)
+    if len(tokens) <= max_tokens:
+        return [text]
+
+    chunks = []
+    step = max_tokens - overlap
+    for start in range(0, len(tokens), step):
+        chunks.append(encoding.decode(tokens[start:start + max_tokens]))
+        if start + max_tokens >= len(tokens):
+            break
+    return chunks
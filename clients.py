@@ -0,0 +1,58 @@
+# ===============================
+# File: clients.py
+# ===============================
+import asyncio
+import hashlib
+import threading
+from typing import Dict
+from agent_config import ModelSettings
+
+
+# Provider SDKs are imported on first use, keeping them out of app start-up
+def _create_openai(api_key: str, model: str, **options):
+    from langchain_openai import ChatOpenAI
+
+    # stream_usage reports token counts on streamed responses; 429s are
+    # retried by the shared rate limiter instead of the client
+    return ChatOpenAI(model=model, openai_api_key=api_key, stream_usage=True, max_retries=0, **options)
+
+
+def _create_perplexity(api_key: str, model: str, **options):
+    from langchain_community.chat_models import ChatPerplexity
+
+    return ChatPerplexity(model=model, api_key=api_key, max_retries=0, **options)
+
+
+_FACTORIES = {
+    "openai": _create_openai,
+    "perplexity": _create_perplexity,
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_chat_model(provider: str, api_key: str, model: str, **options):
+    """
+    Return the process-wide chat client for a provider, API key and model.
+
+    Clients are thread-safe and hold the HTTP connection pool, so reusing one
+    keeps connections alive across analyses instead of repeating the TLS
+    handshake for every new analyzer.
+    """
+    key_hash = hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()
+    key = (provider, key_hash, model, tuple(sorted(options.items())))
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = _FACTORIES[provider](api_key, model, **options)
+        return _clients[key]
+
+
+def get_model_client(settings: ModelSettings, api_keys: Dict[str, str]):
+    """Return the shared client for an agent's ModelSettings (its fallback is built separately)"""
+    return get_chat_model(settings.provider, api_keys[settings.provider], settings.model, **settings.options)
+
+
+def is_timeout(error: Exception) -> bool:
+    """Whether a client error means the request ran past its timeout"""
+    return isinstance(error, (TimeoutError, asyncio.TimeoutError)) or "timeout" in type(error).__name__.lower()
@@ -9,4 +9,67 @@ load_dotenv()
 
 # API Keys
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-PPLX_API_KEY = os.getenv("PPLX_API_KEY")
\ No newline at end of file
+PPLX_API_KEY = os.getenv("PPLX_API_KEY")
+
+# Analysis pipeline
+# Maximum number of analysis stages (LLM calls) allowed in flight at once
+MAX_CONCURRENT_STAGES = int(os.getenv("MAX_CONCURRENT_STAGES", "3"))
+
+# Transcription
+WHISPER_MODEL = os.getenv("WHISPER_MODEL", "small")
+# Parallel Whisper: worker processes (1 keeps the single-call path) and segment sizing
+WHISPER_WORKERS = int(os.getenv("WHISPER_WORKERS", "1"))
+WHISPER_CHUNK_SECONDS = float(os.getenv("WHISPER_CHUNK_SECONDS", "120"))
+WHISPER_CHUNK_OVERLAP = float(os.getenv("WHISPER_CHUNK_OVERLAP", "1.0"))
+# Start the chunked analysis stages on Whisper output while the rest of the audio is still
+# being transcribed; the queue size bounds transcript chunks waiting for an LLM worker
+WHISPER_PIPELINE = os.getenv("WHISPER_PIPELINE", "true").lower() in ("1", "true", "yes")
+PIPELINE_QUEUE_SIZE = int(os.getenv("PIPELINE_QUEUE_SIZE", "4"))
+
+# Transcript cache (on-disk store with an in-memory LRU in front)
+TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", ".cache/transcripts")
+TRANSCRIPT_CACHE_MAX_BYTES = int(os.getenv("TRANSCRIPT_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+TRANSCRIPT_CACHE_TTL = float(os.getenv("TRANSCRIPT_CACHE_TTL", str(30 * 24 * 3600)))
+TRANSCRIPT_CACHE_MEMORY_ENTRIES = int(os.getenv("TRANSCRIPT_CACHE_MEMORY_ENTRIES", "32"))
+
+# LLM response cache: "sqlite", "memory" or "none"
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "sqlite")
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.db")
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", str(7 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+
+# Telemetry: per-run JSON log file (empty disables) and OpenTelemetry export
+TELEMETRY_LOG_PATH = os.getenv("TELEMETRY_LOG_PATH", "")
+TELEMETRY_OTEL = os.getenv("TELEMETRY_OTEL", "false").lower() in ("1", "true", "yes")
+TELEMETRY_OTEL_ENDPOINT = os.getenv("TELEMETRY_OTEL_ENDPOINT", "")
+
+# Claim-level fact checking: parallel Perplexity calls and a cross-video verdict cache
+FACT_CHECK_CONCURRENCY = int(os.getenv("FACT_CHECK_CONCURRENCY", "4"))
+FACT_CHECK_CACHE_PATH = os.getenv("FACT_CHECK_CACHE_PATH", ".cache/fact_checks.db")
+FACT_CHECK_CACHE_TTL = float(os.getenv("FACT_CHECK_CACHE_TTL", str(3 * 24 * 3600)))
+FACT_CHECK_CACHE_MAX_ENTRIES = int(os.getenv("FACT_CHECK_CACHE_MAX_ENTRIES", "20000"))
+
+# Shared per-provider rate limits (requests and tokens per minute) and 429 retry policy
+OPENAI_RPM = float(os.getenv("OPENAI_RPM", "500"))
+OPENAI_TPM = float(os.getenv("OPENAI_TPM", "30000"))
+PPLX_RPM = float(os.getenv("PPLX_RPM", "50"))
+PPLX_TPM = float(os.getenv("PPLX_TPM", "1000000"))
+RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "5"))
+RATE_LIMIT_BASE_DELAY = float(os.getenv("RATE_LIMIT_BASE_DELAY", "1.0"))
+RATE_LIMIT_MAX_DELAY = float(os.getenv("RATE_LIMIT_MAX_DELAY", "60.0"))
+
+# Searchable index of finished analyses, shared by every entry point (empty disables)
+ANALYSIS_INDEX_PATH = os.getenv("ANALYSIS_INDEX_PATH", ".cache/analyses.db")
+
+# Background analysis jobs: SQLite record, worker threads, and how long finished jobs are kept (seconds)
+JOBS_DB_PATH = os.getenv("JOBS_DB_PATH", ".cache/jobs.db")
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", str(7 * 24 * 3600)))
+# Running jobs refresh a heartbeat this often (seconds); one not refreshed for JOB_HEARTBEAT_TIMEOUT
+# belongs to a process that is gone, and any other process marks it failed
+JOB_HEARTBEAT_INTERVAL = float(os.getenv("JOB_HEARTBEAT_INTERVAL", "10"))
+JOB_HEARTBEAT_TIMEOUT = float(os.getenv("JOB_HEARTBEAT_TIMEOUT", "60"))
+
+# HTTP API (api.py): its own job database, so restarting it never touches the app's jobs
+API_JOBS_DB_PATH = os.getenv("API_JOBS_DB_PATH", ".cache/api_jobs.db")
+API_MAX_CONCURRENT_ANALYSES = int(os.getenv("API_MAX_CONCURRENT_ANALYSES", "16"))
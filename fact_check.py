@@ -0,0 +1,68 @@
+# ===============================
+# File: fact_check.py
+# ===============================
+import hashlib
+import re
+import threading
+from typing import List, Optional
+from llm_cache import ResponseCache, SQLiteResponseCache
+from config import FACT_CHECK_CACHE_PATH, FACT_CHECK_CACHE_TTL, FACT_CHECK_CACHE_MAX_ENTRIES
+
+VERDICT_MARKS = ("✅", "❌", "⚠️")
+_LABEL_MARKS = {"true": "✅", "false": "❌", "uncertain": "⚠️"}
+
+# Top-level numbered list items ("1." / "2)"); indented sub-bullets are notes on the claim above
+_LIST_ITEM = re.compile(r"^(?:\*\*)?\d+[.)]\s+(.*\S)\s*$")
+
+# Numbering or bullets a model puts in front of a verdict line
+_LIST_MARKER = re.compile(r"^(?:\d+[.)]|[-*•])\s*")
+
+
+def parse_claims(text: str) -> List[str]:
+    """Extract the individual claims from the claims analyst's numbered list output"""
+    claims = []
+    for line in text.splitlines():
+        match = _LIST_ITEM.match(line)
+        if match:
+            claim = match.group(1).replace("**", "").strip()
+            if claim:
+                claims.append(claim)
+    return claims
+
+
+def normalize_claim(claim: str) -> str:
+    """Reduce a claim to lowercase words so trivially different phrasings share a verdict"""
+    words = re.findall(r"[\w%$.]+", claim.lower())
+    return " ".join(word.strip(".") for word in words if word.strip("."))
+
+
+def verdict_key(claim: str) -> str:
+    return hashlib.sha256(normalize_claim(claim).encode("utf-8")).hexdigest()
+
+
+def format_verdict(verdict: str) -> str:
+    """Make sure a verdict line starts with one of the marks the audit stage expects"""
+    verdict = " ".join(verdict.split())
+    while _LIST_MARKER.match(verdict):
+        verdict = _LIST_MARKER.sub("", verdict, count=1)
+    if not verdict.startswith(VERDICT_MARKS):
+        label = verdict.split(" ", 1)[0].strip(",.:").lower()
+        verdict = f"{_LABEL_MARKS.get(label, '⚠️')} {verdict}"
+    return f"- {verdict}"
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_verdict_cache() -> Optional[ResponseCache]:
+    """Return the process-wide verdict cache, shared by every video that repeats a claim"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None and FACT_CHECK_CACHE_PATH:
+            _default_cache = SQLiteResponseCache(
+                FACT_CHECK_CACHE_PATH,
+                ttl_seconds=FACT_CHECK_CACHE_TTL,
+                max_entries=FACT_CHECK_CACHE_MAX_ENTRIES
+            )
+        return _default_cache
@@ -0,0 +1,393 @@
+# ===============================
+# File: jobs.py
+# ===============================
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+from utils import extract_video_id
+from config import JOBS_DB_PATH, JOB_WORKERS, JOB_RETENTION, JOB_HEARTBEAT_INTERVAL, JOB_HEARTBEAT_TIMEOUT
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+ACTIVE_STATES = (QUEUED, RUNNING)
+
+# Identifies this process among the job owners: host, PID and a token, which tells a restarted
+# process that reuses a PID (PID 1 in a container) from the one that owned the job before it
+_HOST = socket.gethostname()
+_OWNER = f"{_HOST}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def _owner_alive(owner: str) -> bool:
+    """Whether the process that owns a job may still be running; only processes on this host can be checked"""
+    host, pid, _ = (owner or "::").rsplit(":", 2)
+    if host != _HOST:
+        return True
+    if not pid.isdigit():
+        return False
+    if int(pid) == os.getpid():
+        return owner == _OWNER
+    # Signal 0 only probes on POSIX; on Windows os.kill would terminate the process
+    if os.name == "nt":
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def track_stage(stages: Dict[str, str], event: Dict) -> bool:
+    """Apply an analysis event to a job's per-stage states; returns whether they changed"""
+    if event["type"] == "transcript":
+        stages["transcript"] = DONE
+    elif event["type"] == "stage_start":
+        stages[event["stage"]] = RUNNING
+    elif event["type"] == "stage_done":
+        stages[event["stage"]] = DONE
+    else:
+        return False
+    return True
+
+
+class JobStore:
+    """
+    SQLite record of analysis jobs: state, per-stage progress, result and error.
+
+    Each job records the process that runs it, which refreshes the job's
+    heartbeat while it is active. Active jobs whose heartbeat is stale, or
+    whose process on this host has exited, were cut off by a crash or a
+    restart; any store sharing the database marks them failed, on opening
+    and on every heartbeat. Jobs of live processes are left alone.
+    """
+
+    def __init__(self, path: str, retention_seconds: float = 0,
+                 heartbeat_interval: float = JOB_HEARTBEAT_INTERVAL,
+                 heartbeat_timeout: float = JOB_HEARTBEAT_TIMEOUT):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        # Active jobs this store created, kept alive by its heartbeat
+        self._owned = set()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS jobs (
+                       id TEXT PRIMARY KEY,
+                       url TEXT NOT NULL,
+                       video_id TEXT NOT NULL,
+                       state TEXT NOT NULL,
+                       stages TEXT NOT NULL,
+                       result TEXT,
+                       error TEXT,
+                       created_at REAL NOT NULL,
+                       updated_at REAL NOT NULL,
+                       owner TEXT,
+                       heartbeat REAL
+                   )"""
+            )
+            # Databases created before jobs had owners
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (("owner", "TEXT"), ("heartbeat", "REAL")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_video ON jobs (video_id, state)")
+            # At most one active job per video, whichever process creates it (see claim). Databases
+            # written before the index existed may hold duplicates: all but the newest are failed
+            self._conn.execute(
+                "UPDATE jobs SET state = ?, error = ? WHERE state IN (?, ?) AND id NOT IN "
+                "(SELECT id FROM jobs j WHERE state IN (?, ?) AND created_at = "
+                "(SELECT MAX(created_at) FROM jobs WHERE video_id = j.video_id AND state IN (?, ?)))",
+                (FAILED, "Superseded by a duplicate job for the same video", *ACTIVE_STATES * 3)
+            )
+            self._conn.execute(
+                f"CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_video ON jobs (video_id) "
+                f"WHERE state IN ('{QUEUED}', '{RUNNING}')"
+            )
+            # Progress events of active jobs, for readers in other processes
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS job_events (
+                       job_id TEXT NOT NULL,
+                       seq INTEGER NOT NULL,
+                       event TEXT NOT NULL,
+                       PRIMARY KEY (job_id, seq)
+                   )"""
+            )
+            if retention_seconds > 0:
+                self._conn.execute("DELETE FROM jobs WHERE updated_at < ?", (time.time() - retention_seconds,))
+            self._conn.execute("DELETE FROM job_events WHERE job_id NOT IN (SELECT id FROM jobs WHERE state IN (?, ?))",
+                               ACTIVE_STATES)
+        self.reap()
+
+        if heartbeat_interval > 0:
+            threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True).start()
+
+    def reap(self) -> List[str]:
+        """Mark failed the active jobs whose process is gone, returning their IDs"""
+        stale_before = time.time() - self.heartbeat_timeout
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, owner, heartbeat FROM jobs WHERE state IN (?, ?)", ACTIVE_STATES
+            ).fetchall()
+            dead = [
+                job_id for job_id, owner, heartbeat in rows
+                if job_id not in self._owned
+                and (heartbeat is None or heartbeat < stale_before or not _owner_alive(owner))
+            ]
+            if dead:
+                with self._conn:
+                    self._conn.execute(
+                        f"UPDATE jobs SET state = ?, error = ?, updated_at = ? "
+                        f"WHERE state IN (?, ?) AND id IN ({', '.join('?' * len(dead))})",
+                        (FAILED, "Interrupted: the process running it stopped", time.time(), *ACTIVE_STATES, *dead)
+                    )
+        return dead
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_interval)
+            try:
+                with self._lock:
+                    owned = list(self._owned)
+                    if owned:
+                        with self._conn:
+                            self._conn.execute(
+                                f"UPDATE jobs SET heartbeat = ? WHERE id IN ({', '.join('?' * len(owned))})",
+                                (time.time(), *owned)
+                            )
+                self.reap()
+            except sqlite3.Error:
+                # A busy database delays this beat; the timeout allows for several missed ones
+                continue
+
+    def claim(self, url: str, video_id: str) -> Tuple[str, bool]:
+        """
+        Create a queued job for the video unless one is already queued or
+        running, in this process or another sharing the database.
+
+        Returns the job's ID and whether it was created here, in which case
+        the caller must run it.
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            while True:
+                now = time.time()
+                try:
+                    with self._conn:
+                        self._conn.execute(
+                            "INSERT INTO jobs (id, url, video_id, state, stages, created_at, updated_at, "
+                            "owner, heartbeat) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                            (job_id, url, video_id, QUEUED, "{}", now, now, _OWNER, now)
+                        )
+                except sqlite3.IntegrityError:
+                    row = self._conn.execute(
+                        "SELECT id FROM jobs WHERE video_id = ? AND state IN (?, ?)", (video_id, *ACTIVE_STATES)
+                    ).fetchone()
+                    # Otherwise the other job finished in between: try again
+                    if row is not None:
+                        return row[0], False
+                    continue
+                self._owned.add(job_id)
+                return job_id, True
+
+    def update(self, job_id: str, state: str = None, stages: Dict[str, str] = None,
+               result: Dict = None, error: str = None):
+        fields = {"updated_at": time.time()}
+        if state is not None:
+            fields["state"] = state
+        if stages is not None:
+            fields["stages"] = json.dumps(stages)
+        if result is not None:
+            fields["result"] = json.dumps(result, ensure_ascii=False)
+        if error is not None:
+            fields["error"] = error
+        assignments = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+            if state is not None and state not in ACTIVE_STATES:
+                # A finished job's result carries everything its events did
+                self._conn.execute("DELETE FROM job_events WHERE job_id = ?", (job_id,))
+                self._owned.discard(job_id)
+
+    def add_event(self, job_id: str, event: Dict):
+        """Append a progress event to an active job, for event streams served by other processes"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO job_events (job_id, seq, event) "
+                "SELECT ?, COALESCE(MAX(seq), 0) + 1, ? FROM job_events WHERE job_id = ?",
+                (job_id, json.dumps(event, ensure_ascii=False), job_id)
+            )
+
+    def events_since(self, job_id: str, seq: int = 0) -> List[tuple]:
+        """A job's stored events after seq, as (seq, event) pairs"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, seq)
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, url, video_id, state, stages, result, error, created_at, updated_at "
+                "FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0], "url": row[1], "video_id": row[2], "state": row[3],
+            "stages": json.loads(row[4]), "result": json.loads(row[5]) if row[5] else None,
+            "error": row[6], "created_at": row[7], "updated_at": row[8]
+        }
+
+    def find_active(self, video_id: str) -> Optional[str]:
+        """Return the ID of a queued or running job for the video, in this process or another, if there is one"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM jobs WHERE video_id = ? AND state IN (?, ?) ORDER BY created_at DESC LIMIT 1",
+                (video_id, *ACTIVE_STATES)
+            ).fetchone()
+        return row[0] if row else None
+
+    def recent(self, limit: int = 20) -> List[Dict]:
+        """Most recently submitted jobs, without their results"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, url, state, created_at FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [{"id": row[0], "url": row[1], "state": row[2], "created_at": row[3]} for row in rows]
+
+
+class JobQueue:
+    """
+    Worker pool that runs analyses in the background, outside any UI session.
+
+    A job's state and per-stage progress are written to the JobStore as the
+    analysis advances; partial stage text is kept in memory so a caller can
+    reattach to a running job and pick up its output where it is. Submitting
+    a video that already has a job queued or running returns that job, even
+    one run by another process (whose progress arrives as stages complete).
+    """
+
+    def __init__(self, store: JobStore, workers: int = JOB_WORKERS):
+        self.store = store
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="job")
+        self._live = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, analyzer) -> str:
+        video_id = extract_video_id(url) or url
+        with self._lock:
+            job_id, created = self.store.claim(url, video_id)
+            if not created:
+                return job_id
+            self._live[job_id] = {"transcript": None, "texts": {}}
+        self._executor.submit(self._run, job_id, url, analyzer)
+        return job_id
+
+    def _run(self, job_id: str, url: str, analyzer):
+        live = self._live[job_id]
+        stages = {}
+        self.store.update(job_id, state=RUNNING)
+        try:
+            for event in analyzer.analyze_podcast_stream(url):
+                if event["type"] == "transcript":
+                    live["transcript"] = event["text"]
+                elif event["type"] == "stage_start":
+                    live["texts"][event["stage"]] = ""
+                elif event["type"] == "token":
+                    live["texts"][event["stage"]] += event["text"]
+                elif event["type"] == "stage_reset":
+                    live["texts"][event["stage"]] = ""
+                elif event["type"] == "stage_done":
+                    live["texts"][event["stage"]] = event["text"]
+                elif event["type"] == "done":
+                    self.store.update(job_id, state=DONE, stages=stages, result=event["result"])
+
+                if track_stage(stages, event):
+                    self.store.update(job_id, stages=stages)
+        except Exception as e:
+            self.store.update(job_id, state=FAILED, stages=stages, error=str(e))
+        finally:
+            with self._lock:
+                del self._live[job_id]
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a job's stored record, with the partial output of a job still running here"""
+        job = self.store.get(job_id)
+        if job is None:
+            return None
+        live = self._live.get(job_id)
+        if live is not None and job["state"] in ACTIVE_STATES:
+            job["transcript"] = live["transcript"]
+            job["texts"] = dict(live["texts"])
+        return job
+
+    def follow(self, job_id: str, interval: float = 0.5) -> Iterator[Dict]:
+        """
+        Poll a job and yield the same events as PodcastAnalyzer.analyze_podcast_stream.
+
+        Reattaching to a job first replays the progress made so far. A job
+        that failed raises its error from the generator.
+        """
+        sent_transcript = False
+        sent = {}
+        done = set()
+        while True:
+            job = self.get(job_id)
+            if job is None:
+                raise KeyError(f"Unknown job: {job_id}")
+
+            if job["state"] == DONE:
+                yield {"type": "done", "result": job["result"]}
+                return
+            if job["state"] == FAILED:
+                raise Exception(job["error"])
+
+            if job.get("transcript") and not sent_transcript:
+                sent_transcript = True
+                yield {"type": "transcript", "text": job["transcript"]}
+            for stage, text in job.get("texts", {}).items():
+                if stage not in sent:
+                    sent[stage] = ""
+                    yield {"type": "stage_start", "stage": stage}
+                if job["stages"].get(stage) == DONE:
+                    if stage not in done:
+                        done.add(stage)
+                        yield {"type": "stage_done", "stage": stage, "text": text}
+                    continue
+                if not text.startswith(sent[stage]):
+                    # The stage restarted on its fallback model
+                    sent[stage] = ""
+                    yield {"type": "stage_reset", "stage": stage}
+                if len(text) > len(sent[stage]):
+                    yield {"type": "token", "stage": stage, "text": text[len(sent[stage]):]}
+                    sent[stage] = text
+            time.sleep(interval)
+
+
+_default_queue = None
+_default_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    """Return the process-wide job queue configured in config.py"""
+    global _default_queue
+    with _default_queue_lock:
+        if _default_queue is None:
+            _default_queue = JobQueue(JobStore(JOBS_DB_PATH, retention_seconds=JOB_RETENTION), JOB_WORKERS)
+        return _default_queue
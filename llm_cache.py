@@ -0,0 +1,148 @@
+# ===============================
+# File: llm_cache.py
+# ===============================
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional
+from config import LLM_CACHE_BACKEND, LLM_CACHE_PATH, LLM_CACHE_TTL, LLM_CACHE_MAX_ENTRIES
+
+
+def make_cache_key(model_name: str, temperature, messages: List[Dict]) -> str:
+    """Hash the model, temperature and rendered messages into a cache key"""
+    raw = json.dumps([model_name, temperature, messages], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Interface for LLM response caches. Entries expire after ttl_seconds (0 disables expiry)"""
+
+    def __init__(self, ttl_seconds: float = 0, max_entries: int = 1000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str):
+        raise NotImplementedError
+
+
+class MemoryResponseCache(ResponseCache):
+    """Process-local LRU cache"""
+
+    def __init__(self, ttl_seconds: float = 0, max_entries: int = 1000):
+        super().__init__(ttl_seconds, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, created_at = entry
+            if self._expired(created_at):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = (value, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class SQLiteResponseCache(ResponseCache):
+    """Persistent cache shared by every process pointed at the same database file"""
+
+    def __init__(self, path: str, ttl_seconds: float = 0, max_entries: int = 1000):
+        super().__init__(ttl_seconds, max_entries)
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS responses (
+                       key TEXT PRIMARY KEY,
+                       value TEXT NOT NULL,
+                       created_at REAL NOT NULL,
+                       accessed_at REAL NOT NULL
+                   )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at)")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created_at = row
+            if self._expired(created_at):
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return value
+
+    def set(self, key: str, value: str):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now)
+            )
+            if self.ttl_seconds > 0:
+                self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_seconds,))
+            # Keep only the most recently used max_entries rows
+            self._conn.execute(
+                """DELETE FROM responses WHERE key IN (
+                       SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                   )""",
+                (self.max_entries,)
+            )
+
+
+def create_response_cache(backend: str, path: str = None, ttl_seconds: float = 0,
+                          max_entries: int = 1000) -> Optional[ResponseCache]:
+    """Build a response cache for the given backend name ('sqlite', 'memory' or 'none')"""
+    backend = (backend or "none").lower()
+    if backend == "sqlite":
+        return SQLiteResponseCache(path, ttl_seconds=ttl_seconds, max_entries=max_entries)
+    if backend == "memory":
+        return MemoryResponseCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+    if backend == "none":
+        return None
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_response_cache() -> Optional[ResponseCache]:
+    """Return the process-wide response cache configured in config.py"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None and LLM_CACHE_BACKEND.lower() != "none":
+            _default_cache = create_response_cache(
+                LLM_CACHE_BACKEND,
+                path=LLM_CACHE_PATH,
+                ttl_seconds=LLM_CACHE_TTL,
+                max_entries=LLM_CACHE_MAX_ENTRIES
+            )
+        return _default_cache
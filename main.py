@@ -4,6 +4,8 @@
 import streamlit as st
 import time
 from agents import PodcastAnalyzer
+from jobs import get_job_queue, DONE
+from analysis_index import get_analysis_index
 from config import OPENAI_API_KEY, PPLX_API_KEY
 import os
 
@@ -26,6 +28,11 @@ def initialize_api_keys():
 
     return openai_api_key, perplexity_api_key
 
+@st.cache_resource(show_spinner=False)
+def get_analyzer(openai_api_key: str, perplexity_api_key: str) -> PodcastAnalyzer:
+    """Build one analyzer per pair of API keys and reuse it across reruns and sessions"""
+    return PodcastAnalyzer(openai_api_key, perplexity_api_key)
+
 def display_sidebar():
     """Display sidebar information"""
     st.sidebar.title("How it Works")
@@ -45,30 +52,112 @@ def display_sidebar():
     *Version 2.0.0*
     """)
 
-def display_results(result: dict, elapsed_time: float):
-    """Display analysis results in a structured format"""
-    # Display raw transcript in expander
+def display_recent_jobs(jobs):
+    """List recent analyses in the sidebar so any of them can be reopened"""
+    recent = jobs.store.recent(limit=5)
+    if recent:
+        st.sidebar.subheader("Recent Analyses")
+        for job in recent:
+            st.sidebar.markdown(f"[{job['url']}](?job={job['id']}) · {job['state']}")
+
+def display_index_search(index):
+    """Search earlier analyses from the sidebar: matching claims with their verdicts, then passages"""
+    if index is None:
+        return
+    query = st.sidebar.text_input("Search past analyses",
+                                  help="Keywords or a claim, looked up in videos that were already analyzed")
+    if not query:
+        return
+
+    claims = index.find_claims(query, limit=3)
+    for match in claims:
+        st.sidebar.markdown(f"**{match['claim']}**  \n{match['verdict'] or 'No verdict recorded'} · "
+                            f"[video]({match['url']})")
+
+    hits = index.search(query, limit=5)
+    for hit in hits:
+        jumps = " ".join(
+            f"[{int(t['seconds']) // 60}:{int(t['seconds']) % 60:02d}]({t['url']})"
+            for t in index.timestamps(hit["video_id"], query, limit=3)
+        )
+        st.sidebar.markdown(f"[{hit['video_id']}]({hit['url']}) · {hit['field']}: {hit['snippet']} {jumps}")
+
+    if not claims and not hits:
+        st.sidebar.caption("No earlier analysis matches.")
+
+def display_metrics(metrics: dict):
+    """Display per-stage timings, token counts, cost and cache usage"""
+    with st.expander("Show Performance Breakdown"):
+        totals = metrics["totals"]
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Total time", f"{metrics['total_seconds']:.1f}s")
+        col2.metric("Tokens", f"{totals['prompt_tokens'] + totals['completion_tokens']:,}")
+        col3.metric("Est. cost", f"${totals['cost_usd']:.4f}")
+        col4.metric("Cache hits", f"{totals['cache_hits']}/{totals['cache_hits'] + totals['cache_misses']}")
+        st.dataframe(metrics["spans"], use_container_width=True)
+
+def _consume_events(events, transcript_placeholder, sections, status) -> dict:
+    """Render analysis events into their placeholders and return the final result"""
+    buffers = {}
+    result = None
+    for event in events:
+        if event["type"] == "transcript":
+            transcript_placeholder.write(event["text"])
+            status.update(label="Analyzing the transcript...")
+        elif event["type"] == "stage_start":
+            buffers[event["stage"]] = ""
+        elif event["type"] == "token":
+            buffers[event["stage"]] += event["text"]
+            sections[event["stage"]].markdown(buffers[event["stage"]])
+        elif event["type"] == "stage_reset":
+            buffers[event["stage"]] = ""
+            sections[event["stage"]].empty()
+        elif event["type"] == "stage_done":
+            sections[event["stage"]].markdown(event["text"])
+            status.write(f"✔️ {event['stage'].replace('_', ' ').capitalize()} ready")
+        elif event["type"] == "done":
+            result = event["result"]
+
+    # A run joined while already in progress only delivers the final result
+    transcript_placeholder.write(result["raw_transcript"])
+    for stage, placeholder in sections.items():
+        placeholder.markdown(result[stage])
+    return result
+
+def display_results_stream(events, start_time: float, show_metrics: bool = False) -> dict:
+    """Display each section of the analysis as soon as it is produced"""
     with st.expander("Show Raw Transcript"):
-        st.write(result['raw_transcript'])
-    
-    # Display the final analysis
-    st.markdown(result['final_analysis'])
-    
-    # Display individual components in expanders
-    with st.expander("Show Detailed Analysis"):
-        st.write("### Summary")
-        st.write(result['summary'])
-        
-        st.write("### Action Points")
-        st.write(result['action_points'])
-        
-        st.write("### Claims")
-        st.write(result['claims'])
-        
-        st.write("### Fact Check")
-        st.write(result['fact_check'])
-    
+        transcript_placeholder = st.empty()
+    final_placeholder = st.empty()
+
+    # Detailed sections stay open while they fill in
+    sections = {"final_analysis": final_placeholder}
+    with st.expander("Show Detailed Analysis", expanded=True):
+        for stage, title in [("summary", "Summary"), ("action_points", "Action Points"),
+                             ("claims", "Claims"), ("fact_check", "Fact Check")]:
+            st.write(f"### {title}")
+            sections[stage] = st.empty()
+
+    status = st.status("Fetching the transcript...")
+    try:
+        result = _consume_events(events, transcript_placeholder, sections, status)
+    except Exception:
+        status.update(label="Processing failed", state="error")
+        raise
+
+    elapsed_time = time.time() - start_time
+    status.update(label="Analysis complete", state="complete")
+
+    # Display prompt token counts per stage
+    if result.get('token_report'):
+        with st.expander("Show Prompt Token Usage"):
+            st.table(result['token_report'])
+
+    if show_metrics and result.get('metrics'):
+        display_metrics(result['metrics'])
+
     st.success(f"Processing completed in {elapsed_time:.2f} seconds")
+    return result
 
 def run():
     """Main application function"""
@@ -91,6 +180,8 @@ def run():
     if not openai_api_key or not perplexity_api_key:
         return
 
+    show_metrics = st.sidebar.checkbox("Show performance breakdown", value=False)
+
     # Get YouTube URL input
     podcast_url = st.text_input(
         "Enter the YouTube URL of the video you want to analyze",
@@ -115,24 +206,36 @@ def run():
     with col2:
         process_button = st.button("📋 Analyze Video", use_container_width=True)
 
+    # Analyses run as background jobs; the job ID in the URL survives reruns and refreshes
+    jobs = get_job_queue()
+    job_id = st.query_params.get("job")
+    display_recent_jobs(jobs)
+    display_index_search(get_analysis_index())
+
     if process_button:
         if not podcast_url:
             st.error("Please enter a YouTube URL")
             return
 
+        analyzer = get_analyzer(openai_api_key, perplexity_api_key)
+        job_id = jobs.submit(podcast_url, analyzer)
+        st.query_params["job"] = job_id
+
+    if job_id:
+        job = jobs.get(job_id)
+        if job is None:
+            del st.query_params["job"]
+            st.error("This analysis is no longer available. Please start it again.")
+            return
+
+        start_time = job["created_at"]
+        if job["state"] == DONE:
+            # Report how long a finished job took, not how long ago it started
+            start_time = time.time() - (job["updated_at"] - job["created_at"])
+
         try:
-            start_time = time.time()
-            
-            with st.spinner('Processing the video... this may take a few minutes.'):
-                # Initialize analyzer and process video
-                analyzer = PodcastAnalyzer(openai_api_key, perplexity_api_key)
-                result = analyzer.analyze_podcast(podcast_url)
-                
-                # Calculate processing time
-                elapsed_time = time.time() - start_time
-                
-                # Display results
-                display_results(result, elapsed_time)
+            # Reattach to the job and show each section as it is produced
+            display_results_stream(jobs.follow(job_id), start_time, show_metrics)
 
         except Exception as e:
             st.error(f"An error occurred: {str(e)}")
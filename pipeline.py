@@ -0,0 +1,130 @@
+# ===============================
+# File: pipeline.py
+# ===============================
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterable, List
+
+
+class Stage:
+    """A named unit of work that runs once all of its dependencies are done"""
+
+    def __init__(self, name: str, func: Callable[[Dict], object], depends_on: Iterable[str] = ()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+def _validate(stages: List[Stage]):
+    """Reject duplicate names, unknown dependencies and cycles"""
+    names = [stage.name for stage in stages]
+    if len(names) != len(set(names)):
+        raise ValueError(f"Duplicate stage names in {names}")
+
+    for stage in stages:
+        missing = [dep for dep in stage.depends_on if dep not in names]
+        if missing:
+            raise ValueError(f"Stage '{stage.name}' depends on unknown stages: {missing}")
+
+    resolved = set()
+    remaining = list(stages)
+    while remaining:
+        ready = [s for s in remaining if all(dep in resolved for dep in s.depends_on)]
+        if not ready:
+            raise ValueError(f"Cycle detected between stages: {[s.name for s in remaining]}")
+        resolved.update(s.name for s in ready)
+        remaining = [s for s in remaining if s.name not in resolved]
+
+
+def run_stages(stages: List[Stage], max_workers: int = 3) -> Dict[str, object]:
+    """
+    Run a dependency graph of stages on a thread pool.
+
+    Each stage is submitted as soon as every stage it depends on has finished,
+    with at most `max_workers` stages in flight. A stage function receives a
+    dict holding the results of all stages completed so far and runs in a
+    copy of the caller's context, so context variables follow it into the pool.
+    The first failing stage cancels anything not yet started and re-raises.
+    """
+    _validate(stages)
+
+    results = {}
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        while pending or running:
+            for name, stage in list(pending.items()):
+                if all(dep in results for dep in stage.depends_on):
+                    del pending[name]
+                    context = contextvars.copy_context()
+                    running[executor.submit(context.run, stage.func, dict(results))] = name
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+
+    return results
+
+
+def parallel_map(func: Callable, items: Iterable, max_workers: int = 1) -> List:
+    """Map func over items on a thread pool, keeping order and the caller's context"""
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [executor.submit(contextvars.copy_context().run, func, item) for item in items]
+        return [future.result() for future in futures]
+
+
+async def run_stages_async(stages: List[Stage], max_concurrency: int = 3) -> Dict[str, object]:
+    """
+    Run a dependency graph of stages whose functions are coroutine functions.
+
+    Same scheduling as run_stages, but stages are tasks on the running event
+    loop, at most `max_concurrency` of them executing at a time. Tasks copy
+    the caller's context, so context variables follow them as well.
+    """
+    _validate(stages)
+
+    results = {}
+    pending = {stage.name: stage for stage in stages}
+    running = {}
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(stage, inputs):
+        async with semaphore:
+            return await stage.func(inputs)
+
+    while pending or running:
+        for name, stage in list(pending.items()):
+            if all(dep in results for dep in stage.depends_on):
+                del pending[name]
+                running[asyncio.ensure_future(run(stage, dict(results)))] = name
+
+        done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            name = running.pop(task)
+            try:
+                results[name] = task.result()
+            except Exception:
+                for other in running:
+                    other.cancel()
+                raise
+
+    return results
+
+
+async def parallel_map_async(func: Callable, items: Iterable, max_concurrency: int = 1) -> List:
+    """Await the coroutine function func over items, keeping order, with at most max_concurrency at once"""
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def run(item):
+        async with semaphore:
+            return await func(item)
+
+    return list(await asyncio.gather(*(run(item) for item in items)))
@@ -1,44 +1,87 @@
 # ===============================
 # File: podcast_crew.py
 # ===============================
-from crewai import Agent, Crew, Task
-from tools import audio_transcriber
+from crewai import Agent, Crew, Task, LLM
+from utils import get_youtube_transcription
 from config import OPENAI_API_KEY, PPLX_API_KEY
-import yaml
+from rate_limit import get_limiter, call_with_rate_limit, COMPLETION_TOKEN_ESTIMATE
+from chunking import count_tokens
+from agent_config import ModelSettings, get_config_store
+from clients import is_timeout
+from typing import Dict
+import hashlib
 import os
-from langchain_openai import ChatOpenAI
-from langchain_community.chat_models import ChatPerplexity
+import threading
+
+class RateLimitedLLM(LLM):
+    """CrewAI LLM whose calls go through the process-wide limiter of its provider"""
+
+    def __init__(self, provider: str, fallback: LLM = None, **kwargs):
+        super().__init__(**kwargs)
+        self.provider = provider
+        self.fallback = fallback
+        # Reserve the completion the agent may produce; its max_tokens when configured
+        self.completion_tokens = kwargs.get("max_tokens") or COMPLETION_TOKEN_ESTIMATE
+
+    def call(self, messages, callbacks=[]):
+        estimated_tokens = self.completion_tokens + sum(count_tokens(str(message.get('content', ''))) for message in messages)
+        try:
+            return call_with_rate_limit(
+                get_limiter(self.provider),
+                lambda: super(RateLimitedLLM, self).call(messages, callbacks),
+                estimated_tokens
+            )
+        except Exception as e:
+            # Over the agent's time budget: answer from its fallback model
+            if self.fallback is None or not is_timeout(e):
+                raise
+            return self.fallback.call(messages, callbacks)
+
+
+_crew_llms = {}
+_crew_llms_lock = threading.Lock()
+
+
+def get_crew_llm(settings: ModelSettings, api_keys: Dict[str, str]) -> LLM:
+    """Return the shared CrewAI LLM for an agent's ModelSettings, built with its fallback"""
+    key = (settings, hashlib.sha256((api_keys[settings.provider] or "").encode("utf-8")).hexdigest())
+    with _crew_llms_lock:
+        if key not in _crew_llms:
+            fallback = None
+            if settings.fallback:
+                fallback = RateLimitedLLM(
+                    provider=settings.fallback.provider,
+                    model=f"{settings.fallback.provider}/{settings.fallback.model}",
+                    api_key=api_keys[settings.fallback.provider],
+                    max_retries=0,
+                    **settings.fallback.options
+                )
+            _crew_llms[key] = RateLimitedLLM(
+                provider=settings.provider,
+                fallback=fallback,
+                model=f"{settings.provider}/{settings.model}",
+                api_key=api_keys[settings.provider],
+                max_retries=0,
+                **settings.options
+            )
+        return _crew_llms[key]
+
+# Agents that take part in the crew, in agents.yaml order
+CREW_AGENTS = ("summarizer", "action_point_specialist", "claims_analyst", "fact_checker", "content_auditor")
 
 class PodcastCrew:
     """Podcast summarizer Crew"""
 
     def __init__(self):
-        # Load configurations
-        with open('config/agents.yaml', 'r') as f:
-            self.agents_config = yaml.safe_load(f)
-        with open('config/tasks.yaml', 'r') as f:
-            self.tasks_config = yaml.safe_load(f)
-            
-        if self.agents_config is None or self.tasks_config is None:
-            raise ValueError("Failed to load configurations.")
-
-        # Load audio transcriber tool
-        self.audio_tool = [audio_transcriber]
-
-        # Configure model from OpenAI
-        self.openai_api_key = OPENAI_API_KEY
-        self.gpt_llm = ChatOpenAI(
-            temperature=0.2,
-            openai_api_key=self.openai_api_key,
-            model="openai/gpt-4-1106-preview"
-        )
+        # Load configurations, parsed once per process unless the files change
+        config = get_config_store().get()
+        self.agents_config = config.agents
+        self.tasks_config = config.tasks
 
-        # Configure Perplexity Llama-3.1-Sonar using Perplexity's API
-        self.perplexity_api_key = PPLX_API_KEY
-        self.pplx_llm = ChatPerplexity(
-            api_key=self.perplexity_api_key,
-            model="perplexity/llama-3.1-sonar-huge-128k-online"
-        )
+        # Each agent's model comes from agents.yaml, shared with PodcastAnalyzer's routing
+        self.api_keys = {"openai": OPENAI_API_KEY, "perplexity": PPLX_API_KEY}
+        self.llms = {agent_type: get_crew_llm(config.models[agent_type], self.api_keys)
+                     for agent_type in CREW_AGENTS}
 
         # Initialize agents and tasks in the correct order
         self.agents = self._create_agents()
@@ -47,91 +90,53 @@ class PodcastCrew:
 
     def _create_agents(self):
         return {
-            'transcriber': Agent(
-                role=self.agents_config['transcriber']['role'],
-                goal=self.agents_config['transcriber']['goal'],
-                backstory=self.agents_config['transcriber']['backstory'],
-                tools=self.audio_tool,
-                verbose=True,
-                llm=self.gpt_llm
-            ),
-            'summarizer': Agent(
-                role=self.agents_config['summarizer']['role'],
-                goal=self.agents_config['summarizer']['goal'],
-                backstory=self.agents_config['summarizer']['backstory'],
+            agent_type: Agent(
+                role=self.agents_config[agent_type]['role'],
+                goal=self.agents_config[agent_type]['goal'],
+                backstory=self.agents_config[agent_type]['backstory'],
                 tools=[],
                 verbose=True,
-                llm=self.gpt_llm
-            ),
-            'action_point_specialist': Agent(
-                role=self.agents_config['action_point_specialist']['role'],
-                goal=self.agents_config['action_point_specialist']['goal'],
-                backstory=self.agents_config['action_point_specialist']['backstory'],
-                tools=[],
-                verbose=True,
-                llm=self.gpt_llm
-            ),
-            'content_auditor': Agent(
-                role=self.agents_config['content_auditor']['role'],
-                goal=self.agents_config['content_auditor']['goal'],
-                backstory=self.agents_config['content_auditor']['backstory'],
-                tools=[],
-                verbose=True,
-                llm=self.gpt_llm
-            ),
-            'claims_analyst': Agent(
-                role=self.agents_config['claims_analyst']['role'],
-                goal=self.agents_config['claims_analyst']['goal'],
-                backstory=self.agents_config['claims_analyst']['backstory'],
-                tools=[],
-                verbose=True,
-                llm=self.gpt_llm
-            ),
-            'fact_checker': Agent(
-                role=self.agents_config['fact_checker']['role'],
-                goal=self.agents_config['fact_checker']['goal'],
-                backstory=self.agents_config['fact_checker']['backstory'],
-                tools=[],
-                verbose=True,
-                llm=self.pplx_llm
+                llm=self.llms[agent_type]
             )
+            for agent_type in CREW_AGENTS
         }
 
+    def _with_transcript(self, task_name: str) -> str:
+        """A task description followed by the transcript, which kickoff passes in as input"""
+        return self.tasks_config[task_name]['description'] + "\n\nTranscript:\n{transcript}"
+
     def _create_tasks(self):
-        """Create all tasks for the crew with proper dependencies"""
-        
-        # Transcription task (no dependencies)
-        transcription_task = Task(
-            description=self.tasks_config['transcription_task']['description'],
-            expected_output="A complete text transcription of the YouTube video's audio content.",
-            agent=self.agents['transcriber']
-        )
-        self.tasks.append(transcription_task)
+        """
+        Create all tasks for the crew with proper dependencies.
 
-        # Summary task (depends on transcription)
+        Summary, insights and claims only read the transcript, so they run
+        in parallel (async_execution). CrewAI makes a synchronous task wait
+        for every pending async task, and an async task may not take the
+        output of the async tasks just before it, so fact checking (which
+        needs the claims) is the first synchronous task, followed by the audit.
+        """
+        # Summary, insights and claims (parallel, transcript only)
         summary_task = Task(
-            description=self.tasks_config['summary_task']['description'],
+            description=self._with_transcript('summary_task'),
             expected_output="A concise summary of the key points discussed in the podcast.",
             agent=self.agents['summarizer'],
-            context=[transcription_task]
+            async_execution=True
         )
         self.tasks.append(summary_task)
 
-        # Actionable insights task (depends on summary)
         insights_task = Task(
-            description=self.tasks_config['actionable_insights_task']['description'],
+            description=self._with_transcript('actionable_insights_task'),
             expected_output="A list of actionable insights and takeaways from the podcast content.",
             agent=self.agents['action_point_specialist'],
-            context=[summary_task]
+            async_execution=True
         )
         self.tasks.append(insights_task)
 
-        # Claims identification task (depends on transcription and summary)
         claims_task = Task(
-            description=self.tasks_config['claims_identification_task']['description'],
+            description=self._with_transcript('claims_identification_task'),
             expected_output="A list of significant claims made during the podcast that require fact-checking.",
             agent=self.agents['claims_analyst'],
-            context=[transcription_task, summary_task]
+            async_execution=True
         )
         self.tasks.append(claims_task)
 
@@ -149,17 +154,21 @@ class PodcastCrew:
             description=self.tasks_config['quality_audit_task']['description'],
             expected_output="A comprehensive quality assessment of all previous analyses and a final report.",
             agent=self.agents['content_auditor'],
-            context=[transcription_task, summary_task, insights_task, claims_task, fact_check_task]
+            context=[summary_task, insights_task, claims_task, fact_check_task]
         )
         self.tasks.append(audit_task)
 
     def kickoff(self, inputs):
-        """Start the crew's work"""
+        """Fetch the transcript directly, then start the crew's work with it as input"""
+        transcript = get_youtube_transcription(inputs['youtube_url'])
+        if not transcript or transcript.startswith("Error"):
+            raise Exception(f"Transcription failed: {transcript}")
+
         crew = Crew(
             agents=list(self.agents.values()),
             tasks=self.tasks,
             verbose=True
         )
         
-        result = crew.kickoff(inputs=inputs)
-        return result
\ No newline at end of file
+        result = crew.kickoff(inputs={**inputs, 'transcript': transcript})
+        return result
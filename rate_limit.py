@@ -0,0 +1,269 @@
+# ===============================
+# File: rate_limit.py
+# ===============================
+import asyncio
+import heapq
+import itertools
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Optional, Tuple
+from config import (OPENAI_RPM, OPENAI_TPM, PPLX_RPM, PPLX_TPM,
+                    RATE_LIMIT_MAX_RETRIES, RATE_LIMIT_BASE_DELAY, RATE_LIMIT_MAX_DELAY)
+
+# Completion size assumed when reserving capacity for a call with no max_tokens set
+COMPLETION_TOKEN_ESTIMATE = 500
+
+# Lower values are served first
+INTERACTIVE = 0
+BATCH = 1
+
+request_priority: ContextVar = ContextVar("request_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def priority(level: int):
+    """Run the enclosed requests (and stages started from them) at the given priority"""
+    token = request_priority.set(level)
+    try:
+        yield
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucketLimiter:
+    """
+    Requests-per-minute and tokens-per-minute buckets for one provider.
+
+    Callers wait in priority order, then FIFO, until both buckets can cover
+    their request; threads and coroutines (aacquire) share one queue. A 429
+    from the provider pauses every caller until the server's reset time has
+    passed.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._cond = threading.Condition()
+        # Wake-up callbacks of callers waiting on event loops (see aacquire)
+        self._async_waiters = set()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self._updated = now
+        self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+        self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def _notify(self):
+        """Wake every waiting caller, on threads and on event loops, to re-check the buckets"""
+        self._cond.notify_all()
+        for wake in self._async_waiters:
+            wake()
+
+    def _enqueue(self, tokens: int, level: Optional[int]):
+        level = request_priority.get() if level is None else level
+        # A request larger than the whole bucket would otherwise wait forever
+        tokens = min(tokens, self.tokens_per_minute)
+        waiter = (level, next(self._sequence))
+        heapq.heappush(self._waiters, waiter)
+        return waiter, tokens
+
+    def _dequeue(self, waiter):
+        self._waiters.remove(waiter)
+        heapq.heapify(self._waiters)
+        self._notify()
+
+    def _try_take(self, waiter, tokens: int) -> Tuple[bool, Optional[float]]:
+        """
+        With the lock held, take capacity for waiter if it is first in line and
+        the buckets allow. Otherwise return how long to wait before checking
+        again (None: until woken).
+        """
+        now = time.monotonic()
+        self._refill(now)
+        wait = self._blocked_until - now
+        if wait <= 0 and self._waiters[0] == waiter:
+            if self._requests >= 1 and self._tokens >= tokens:
+                self._requests -= 1
+                self._tokens -= tokens
+                return True, None
+            wait = max((1 - self._requests) * 60 / self.requests_per_minute,
+                       (tokens - self._tokens) * 60 / self.tokens_per_minute)
+        return False, wait if wait > 0 else None
+
+    def acquire(self, tokens: int, level: int = None):
+        """Block until one request of roughly `tokens` tokens may be sent"""
+        with self._cond:
+            waiter, tokens = self._enqueue(tokens, level)
+            try:
+                while True:
+                    taken, wait = self._try_take(waiter, tokens)
+                    if taken:
+                        return
+                    self._cond.wait(timeout=wait)
+            finally:
+                self._dequeue(waiter)
+
+    async def aacquire(self, tokens: int, level: int = None):
+        """acquire for coroutines: waits on the event loop instead of holding a thread"""
+        loop = asyncio.get_running_loop()
+        woken = asyncio.Event()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(woken.set)
+            except RuntimeError:
+                pass  # the waiter's loop has closed
+
+        with self._cond:
+            waiter, tokens = self._enqueue(tokens, level)
+            self._async_waiters.add(wake)
+        try:
+            while True:
+                with self._cond:
+                    taken, wait = self._try_take(waiter, tokens)
+                    if taken:
+                        return
+                    # Cleared under the lock, so no wake-up between this check and the wait is lost
+                    woken.clear()
+                try:
+                    await asyncio.wait_for(woken.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(wake)
+                self._dequeue(waiter)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int):
+        """Correct the token bucket once the real usage of a request is known"""
+        with self._cond:
+            self._tokens = min(self.tokens_per_minute, self._tokens + estimated_tokens - actual_tokens)
+            self._notify()
+
+    def pause(self, seconds: float):
+        """Hold back every caller for `seconds`, e.g. after the provider returned 429"""
+        with self._cond:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+            self._notify()
+
+
+_DURATION = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_UNIT_SECONDS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse '20', '1.5s', '250ms' or '6m0s' into seconds"""
+    value = str(value).strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _UNIT_SECONDS[unit] for amount, unit in parts)
+
+
+def rate_limit_delay(exc: Exception) -> Optional[float]:
+    """Return the server-suggested wait for a 429 error, 0 if it gave none, or None if exc is not a 429"""
+    response = getattr(exc, "response", None)
+    status = getattr(exc, "status_code", None) or getattr(response, "status_code", None)
+    if status != 429:
+        return None
+
+    headers = {key.lower(): value for key, value in dict(getattr(response, "headers", None) or {}).items()}
+    if "retry-after-ms" in headers:
+        return float(headers["retry-after-ms"]) / 1000
+    delays = [_parse_duration(headers[name]) for name in
+              ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens") if name in headers]
+    delays = [delay for delay in delays if delay is not None]
+    return max(delays) if delays else 0.0
+
+
+def _retry_after_error(limiter: TokenBucketLimiter, error: Exception, attempt: int) -> bool:
+    """
+    Decide whether a failed call is retried, pausing the limiter if so.
+
+    The wait is the larger of the server's reset hint and an exponential
+    backoff scaled by a random factor, so sessions do not retry in lockstep.
+    """
+    delay = rate_limit_delay(error)
+    if delay is None or attempt == RATE_LIMIT_MAX_RETRIES:
+        return False
+    backoff = min(RATE_LIMIT_MAX_DELAY, RATE_LIMIT_BASE_DELAY * 2 ** attempt)
+    limiter.pause(max(delay, backoff * random.uniform(0.5, 1.0)))
+    return True
+
+
+def call_with_rate_limit(limiter: TokenBucketLimiter, func: Callable, estimated_tokens: int,
+                         usage: Callable = None):
+    """
+    Call func under the limiter, retrying 429 responses with jittered backoff.
+
+    `usage`, if given, maps func's result to the tokens it actually used.
+    """
+    for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+        limiter.acquire(estimated_tokens)
+        try:
+            result = func()
+        except Exception as e:
+            if not _retry_after_error(limiter, e, attempt):
+                raise
+            continue
+
+        if usage is not None:
+            actual = usage(result)
+            if actual:
+                limiter.record_usage(estimated_tokens, actual)
+        return result
+
+
+async def acall_with_rate_limit(limiter: TokenBucketLimiter, func: Callable, estimated_tokens: int,
+                                usage: Callable = None):
+    """call_with_rate_limit for a coroutine function; waiting for capacity does not block the event loop"""
+    for attempt in range(RATE_LIMIT_MAX_RETRIES + 1):
+        await limiter.aacquire(estimated_tokens)
+        try:
+            result = await func()
+        except Exception as e:
+            if not _retry_after_error(limiter, e, attempt):
+                raise
+            continue
+
+        if usage is not None:
+            actual = usage(result)
+            if actual:
+                limiter.record_usage(estimated_tokens, actual)
+        return result
+
+
+_limiters: Dict[str, TokenBucketLimiter] = {}
+_limiters_lock = threading.Lock()
+
+PROVIDER_LIMITS = {
+    "openai": (OPENAI_RPM, OPENAI_TPM),
+    "perplexity": (PPLX_RPM, PPLX_TPM),
+}
+
+
+def get_limiter(provider: str) -> TokenBucketLimiter:
+    """Return the process-wide limiter for a provider"""
+    with _limiters_lock:
+        if provider not in _limiters:
+            _limiters[provider] = TokenBucketLimiter(*PROVIDER_LIMITS[provider])
+        return _limiters[provider]
+
+
+def provider_for(llm) -> str:
+    """Name the provider behind a chat model client"""
+    return "perplexity" if "perplexity" in type(llm).__name__.lower() else "openai"
@@ -0,0 +1,124 @@
+# ===============================
+# File: salience.py
+# ===============================
+import re
+from typing import Dict, List, Tuple
+import numpy as np
+from chunking import get_encoding
+
+# Sentence ends; auto-generated captions have none, so long runs are also cut by word count
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+MAX_SENTENCE_WORDS = 40
+
+WORD = re.compile(r"[a-z0-9']+")
+NUMBER = re.compile(r"\d")
+
+# Words that tend to carry assertions or advice
+CUE_WORDS = frozenset("""
+    percent study studies research data evidence proven shows found according million billion
+    times increase decrease risk always never should must need recommend try avoid start stop best
+    worst because cause causes leads
+""".split())
+
+# Filler that TF-IDF alone would not discount in a short transcript
+STOP_WORDS = frozenset("""
+    a an and are as at be but by for from has have i if in is it its of on or so that the this
+    to was we were with you your yeah like um uh just really know mean right okay oh
+""".split())
+
+# Weight of number and cue-word density relative to the normalized TF-IDF score
+CUE_WEIGHT = 0.5
+
+
+def split_sentences(text: str, max_words: int = MAX_SENTENCE_WORDS) -> List[str]:
+    """Split a transcript into sentences, cutting unpunctuated runs every max_words words"""
+    sentences = []
+    for sentence in SENTENCE_END.split(text):
+        words = sentence.split()
+        for start in range(0, len(words), max_words):
+            sentences.append(" ".join(words[start:start + max_words]))
+    return sentences
+
+
+def score_sentences(sentences: List[str]) -> np.ndarray:
+    """
+    Score sentences by how much distinctive, checkable content they carry.
+
+    Each sentence is a document: its score is its summed TF-IDF weight over
+    the square root of its length, scaled to [0, 1], plus the density of
+    numbers and cue words (CUE_WORDS) weighted by CUE_WEIGHT.
+    """
+    tokens = [WORD.findall(sentence.lower()) for sentence in sentences]
+    lengths = np.array([len(words) for words in tokens], dtype=np.float64)
+
+    vocabulary = {}
+    term_ids, sentence_ids, cues = [], [], np.zeros(len(sentences))
+    for index, words in enumerate(tokens):
+        for word in words:
+            if NUMBER.search(word) or word in CUE_WORDS:
+                cues[index] += 1
+            if word in STOP_WORDS:
+                continue
+            term_ids.append(vocabulary.setdefault(word, len(vocabulary)))
+            sentence_ids.append(index)
+    if not term_ids:
+        return np.zeros(len(sentences))
+
+    term_ids = np.array(term_ids)
+    sentence_ids = np.array(sentence_ids)
+
+    # Document frequency: sentences containing each term
+    pairs = np.unique(sentence_ids * len(vocabulary) + term_ids)
+    df = np.bincount(pairs % len(vocabulary), minlength=len(vocabulary))
+    idf = np.log((1 + len(sentences)) / (1 + df)) + 1
+
+    # Summing idf over every occurrence is the sentence's tf * idf total
+    weight = np.bincount(sentence_ids, weights=idf[term_ids], minlength=len(sentences))
+    tfidf = weight / np.sqrt(np.maximum(lengths, 1))
+    if tfidf.max() > 0:
+        tfidf /= tfidf.max()
+    return tfidf + CUE_WEIGHT * cues / np.maximum(lengths, 1)
+
+
+def select_salient(text: str, max_tokens: int, context: int = 1,
+                   model_name: str = "gpt-4") -> Tuple[str, Dict]:
+    """
+    Keep the highest-scoring sentences of text, with `context` neighbours on
+    each side, until max_tokens is reached.
+
+    Kept sentences stay in transcript order; gaps are marked with "[...]".
+    Returns the shortened text and its input/kept token counts and the
+    fraction of tokens removed. Text already within budget is returned as is.
+    """
+    encoding = get_encoding(model_name)
+    sentences = split_sentences(text)
+    sentence_tokens = np.array([len(tokens) for tokens in encoding.encode_batch(sentences)]) \
+        if sentences else np.zeros(0, dtype=int)
+    input_tokens = int(sentence_tokens.sum())
+    if input_tokens <= max_tokens:
+        return text, {"input_tokens": input_tokens, "kept_tokens": input_tokens, "reduction": 0.0}
+
+    keep = np.zeros(len(sentences), dtype=bool)
+    kept_tokens = 0
+    for index in np.argsort(-score_sentences(sentences), kind="stable"):
+        window = np.arange(max(0, index - context), min(len(sentences), index + context + 1))
+        added = int(sentence_tokens[window[~keep[window]]].sum())
+        if kept_tokens + added > max_tokens:
+            continue
+        keep[window] = True
+        kept_tokens += added
+        if kept_tokens >= max_tokens:
+            break
+
+    parts = []
+    for index in np.flatnonzero(keep):
+        if parts and not keep[index - 1]:
+            parts.append("[...]")
+        parts.append(sentences[index])
+
+    stats = {
+        "input_tokens": input_tokens,
+        "kept_tokens": kept_tokens,
+        "reduction": round(1 - kept_tokens / input_tokens, 3),
+    }
+    return " ".join(parts), stats
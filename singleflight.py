@@ -0,0 +1,77 @@
+# ===============================
+# File: singleflight.py
+# ===============================
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls that share a key into one execution.
+
+    The first caller for a key runs the function; callers arriving while it
+    is still running wait for, and receive, the same result or exception.
+    Once the call finishes the key is forgotten, so later calls run afresh
+    (caches in front of the work decide what is reused after that).
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return future.result()
+
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    async def ado(self, key: Hashable, func: Callable, *args, **kwargs):
+        """
+        Like do, for coroutine functions.
+
+        Callers on threads and on event loops share the same flights, so an
+        async caller can join a call a thread started and vice versa.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+
+        if not leader:
+            return await asyncio.wrap_future(future)
+
+        try:
+            future.set_result(await func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    def in_flight(self, key: Hashable) -> bool:
+        with self._lock:
+            return key in self._calls
+
+
+# Process-wide groups: whole analyses keyed by video ID, and individual LLM calls
+analysis_flights = SingleFlight()
+llm_flights = SingleFlight()
@@ -0,0 +1,157 @@
+# ===============================
+# File: telemetry.py
+# ===============================
+import json
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Optional
+from config import TELEMETRY_LOG_PATH, TELEMETRY_OTEL, TELEMETRY_OTEL_ENDPOINT
+
+# USD per 1K (prompt, completion) tokens; unknown models are reported without a cost
+MODEL_PRICES_PER_1K = {
+    "gpt-4": (0.03, 0.06),
+    "gpt-4-turbo": (0.01, 0.03),
+    "gpt-4o": (0.0025, 0.01),
+    "gpt-4o-mini": (0.00015, 0.0006),
+    "gpt-3.5-turbo": (0.0005, 0.0015),
+    "llama-3.1-sonar-small-128k-online": (0.0002, 0.0002),
+    "llama-3.1-sonar-large-128k-online": (0.001, 0.001),
+    "llama-3.1-sonar-huge-128k-online": (0.005, 0.005),
+}
+
+_current_trace: ContextVar = ContextVar("current_trace", default=None)
+_current_span: ContextVar = ContextVar("current_span", default=None)
+
+
+def estimate_cost(model_name: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Estimate the USD cost of one call from its token counts"""
+    prices = MODEL_PRICES_PER_1K.get(model_name)
+    if prices is None:
+        return None
+    return round((prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1000, 6)
+
+
+class Trace:
+    """Spans recorded during one analysis run, possibly from several threads"""
+
+    def __init__(self):
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, record: Dict):
+        with self._lock:
+            self.spans.append(record)
+
+    def summary(self) -> Dict:
+        """Span timings in start order plus token, cost and cache totals"""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record["start"])
+
+        totals = {"prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "cache_hits": 0, "cache_misses": 0}
+        for record in spans:
+            attributes = record["attributes"]
+            totals["prompt_tokens"] += attributes.get("prompt_tokens", 0)
+            totals["completion_tokens"] += attributes.get("completion_tokens", 0)
+            totals["cost_usd"] += attributes.get("cost_usd") or 0.0
+            if "cache_hit" in attributes:
+                totals["cache_hits" if attributes["cache_hit"] else "cache_misses"] += 1
+        totals["cost_usd"] = round(totals["cost_usd"], 6)
+
+        roots = [record for record in spans if record["parent"] is None]
+        return {
+            "total_seconds": round(sum(record["seconds"] for record in roots), 3),
+            "spans": [
+                {"name": r["name"], "parent": r["parent"], "seconds": r["seconds"],
+                 **({"error": r["error"]} if "error" in r else {}), **r["attributes"]}
+                for r in spans
+            ],
+            "totals": totals,
+        }
+
+
+_otel_tracer = None
+_otel_lock = threading.Lock()
+
+
+def _get_otel_tracer():
+    """Return an OpenTelemetry tracer when enabled, configuring an OTLP exporter if an endpoint is set"""
+    global _otel_tracer
+    if not TELEMETRY_OTEL:
+        return None
+
+    with _otel_lock:
+        if _otel_tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError:
+                return None
+
+            if TELEMETRY_OTEL_ENDPOINT:
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+                provider = TracerProvider(resource=Resource.create({"service.name": "video-fact-finder"}))
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=TELEMETRY_OTEL_ENDPOINT)))
+                trace.set_tracer_provider(provider)
+
+            _otel_tracer = trace.get_tracer("video-fact-finder")
+        return _otel_tracer
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """
+    Time a block of work as a span of the current trace.
+
+    Yields the span's attribute dict; anything added to it (token counts,
+    cache hits, ...) is kept with the span. Spans opened in stage threads
+    nest correctly because the pipeline copies context into its workers.
+    """
+    parent = _current_span.get()
+    record = {"name": name, "parent": parent["name"] if parent else None,
+              "start": time.time(), "attributes": dict(attributes)}
+    span_token = _current_span.set(record)
+
+    tracer = _get_otel_tracer()
+    otel_span = tracer.start_as_current_span(name) if tracer else None
+    otel_current = otel_span.__enter__() if otel_span else None
+
+    started = time.perf_counter()
+    try:
+        yield record["attributes"]
+    except Exception as e:
+        record["error"] = str(e)
+        raise
+    finally:
+        record["seconds"] = round(time.perf_counter() - started, 3)
+        _current_span.reset(span_token)
+
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(record)
+
+        if otel_span is not None:
+            for key, value in record["attributes"].items():
+                if isinstance(value, (str, bool, int, float)):
+                    otel_current.set_attribute(key, value)
+            if "error" in record:
+                otel_current.set_attribute("error", record["error"])
+            otel_span.__exit__(None, None, None)
+
+
+@contextmanager
+def start_trace():
+    """Collect every span opened in this context into a new Trace, logging it as JSON on exit"""
+    trace = Trace()
+    trace_token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(trace_token)
+        if TELEMETRY_LOG_PATH:
+            with open(TELEMETRY_LOG_PATH, 'a') as f:
+                f.write(json.dumps(trace.summary(), default=str) + "\n")
@@ -0,0 +1,44 @@
+import pytest
+
+from fact_check import parse_claims, normalize_claim, verdict_key, format_verdict
+
+CLAIMS_OUTPUT = """Here are the claims made in the episode:
+
+1. Coffee doubles your lifespan
+   - Flagged: no source given
+   2. An indented sub-item is a note, not a claim
+2) **Sleep under six hours raises injury risk by 70%**
+**3. Cold showers boost immunity**
+- A bullet without a number is commentary
+4.   
+"""
+
+
+def test_parse_claims_reads_top_level_numbered_items():
+    assert parse_claims(CLAIMS_OUTPUT) == [
+        "Coffee doubles your lifespan",
+        "Sleep under six hours raises injury risk by 70%",
+        "Cold showers boost immunity",
+    ]
+
+
+def test_parse_claims_without_a_list_finds_nothing():
+    assert parse_claims("The episode makes no checkable claims.") == []
+
+
+def test_trivially_different_phrasings_share_a_verdict_key():
+    assert normalize_claim("Coffee doubles your LIFESPAN.") == "coffee doubles your lifespan"
+    assert verdict_key("Coffee doubles your lifespan") == verdict_key("  coffee, doubles your lifespan!")
+    assert verdict_key("Coffee doubles your lifespan") != verdict_key("Tea doubles your lifespan")
+
+
+@pytest.mark.parametrize("response, verdict", [
+    ("✅ Water is wet.", "- ✅ Water is wet."),
+    ("1. ❌ Coffee doubles your lifespan: no evidence", "- ❌ Coffee doubles your lifespan: no evidence"),
+    ("- 2) ⚠️ Mixed\n  evidence", "- ⚠️ Mixed evidence"),
+    ("True: the study exists", "- ✅ True: the study exists"),
+    ("False, it was retracted", "- ❌ False, it was retracted"),
+    ("Hard to say", "- ⚠️ Hard to say"),
+])
+def test_format_verdict_yields_one_marked_line(response, verdict):
+    assert format_verdict(response) == verdict
@@ -0,0 +1,129 @@
+import asyncio
+import contextvars
+import threading
+import time
+
+import pytest
+
+from pipeline import Stage, run_stages, parallel_map, run_stages_async, parallel_map_async
+
+request_id = contextvars.ContextVar("request_id", default=None)
+
+
+def test_stages_receive_the_results_of_their_dependencies():
+    stages = [
+        Stage("a", lambda r: 1),
+        Stage("b", lambda r: r["a"] + 1, depends_on=["a"]),
+        Stage("c", lambda r: r["a"] + r["b"], depends_on=["a", "b"]),
+    ]
+    assert run_stages(stages) == {"a": 1, "b": 2, "c": 3}
+
+
+def test_independent_stages_run_at_the_same_time():
+    # Each stage waits for the other two, so this only finishes if all three run at once
+    barrier = threading.Barrier(3, timeout=5)
+    stages = [Stage(name, lambda r: barrier.wait()) for name in ("summary", "action_points", "claims")]
+    assert set(run_stages(stages, max_workers=3)) == {"summary", "action_points", "claims"}
+
+
+def test_a_stage_starts_without_waiting_for_unrelated_stages():
+    claims_done = threading.Event()
+    stages = [
+        Stage("summary", lambda r: claims_done.wait(timeout=5)),
+        Stage("claims", lambda r: "claims"),
+        Stage("fact_check", lambda r: claims_done.set() or "checked", depends_on=["claims"]),
+    ]
+    results = run_stages(stages, max_workers=2)
+    assert results["summary"] is True
+    assert results["fact_check"] == "checked"
+
+
+def test_max_workers_bounds_stages_in_flight():
+    lock = threading.Lock()
+    running = []
+    peak = []
+
+    def work(results):
+        with lock:
+            running.append(1)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.pop()
+
+    run_stages([Stage(str(i), work) for i in range(6)], max_workers=2)
+    assert max(peak) == 2
+
+
+@pytest.mark.parametrize("stages", [
+    [Stage("a", lambda r: 1), Stage("a", lambda r: 2)],
+    [Stage("a", lambda r: 1, depends_on=["missing"])],
+    [Stage("a", lambda r: 1, depends_on=["b"]), Stage("b", lambda r: 2, depends_on=["a"])],
+])
+def test_invalid_graphs_are_rejected(stages):
+    with pytest.raises(ValueError):
+        run_stages(stages)
+
+
+def test_a_failing_stage_is_reraised_and_its_dependents_never_run():
+    ran = []
+
+    def fail(results):
+        raise RuntimeError("claims failed")
+
+    stages = [
+        Stage("claims", fail),
+        Stage("fact_check", lambda r: ran.append("fact_check"), depends_on=["claims"]),
+    ]
+    with pytest.raises(RuntimeError, match="claims failed"):
+        run_stages(stages)
+    assert ran == []
+
+
+def test_context_variables_follow_stages_into_the_pool():
+    token = request_id.set("abc")
+    try:
+        results = run_stages([Stage("a", lambda r: request_id.get())])
+        assert results == {"a": "abc"}
+        assert parallel_map(lambda item: (item, request_id.get()), [1, 2], 2) == [(1, "abc"), (2, "abc")]
+    finally:
+        request_id.reset(token)
+
+
+def test_parallel_map_keeps_item_order():
+    assert parallel_map(lambda item: time.sleep(0.01 * (5 - item)) or item * 2, range(5), 5) == [0, 2, 4, 6, 8]
+
+
+def test_async_stages_follow_the_same_graph():
+    async def value(n):
+        await asyncio.sleep(0)
+        return n
+
+    stages = [
+        Stage("a", lambda r: value(1)),
+        Stage("b", lambda r: value(r["a"] + 1), depends_on=["a"]),
+        Stage("c", lambda r: value(10)),
+    ]
+    assert asyncio.run(run_stages_async(stages)) == {"a": 1, "b": 2, "c": 10}
+
+
+def test_async_max_concurrency_bounds_stages_in_flight():
+    running = []
+    peak = []
+
+    async def work(results):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+
+    asyncio.run(run_stages_async([Stage(str(i), work) for i in range(5)], max_concurrency=2))
+    assert max(peak) == 2
+
+
+def test_parallel_map_async_keeps_item_order():
+    async def double(item):
+        await asyncio.sleep(0.01 * (3 - item))
+        return item * 2
+
+    assert asyncio.run(parallel_map_async(double, range(4), 4)) == [0, 2, 4, 6]
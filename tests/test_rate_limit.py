@@ -0,0 +1,210 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import rate_limit
+from rate_limit import (TokenBucketLimiter, BATCH, INTERACTIVE, priority, rate_limit_delay,
+                        call_with_rate_limit, acall_with_rate_limit)
+
+
+class RateLimitError(Exception):
+    """Shaped like the provider SDKs' 429 errors"""
+
+    def __init__(self, headers=None):
+        super().__init__("429")
+        self.status_code = 429
+        self.response = type("Response", (), {"status_code": 429, "headers": headers or {}})()
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_BASE_DELAY", 0.01)
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_MAX_DELAY", 0.01)
+
+
+def test_requests_within_the_bucket_are_not_delayed():
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=10_000)
+    started = time.monotonic()
+    for _ in range(5):
+        limiter.acquire(100)
+    assert time.monotonic() - started < 0.05
+
+
+def test_an_empty_request_bucket_waits_for_refill():
+    # 600 per minute refills one request every 0.1s
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=10_000)
+    limiter._requests = 0.0
+    started = time.monotonic()
+    limiter.acquire(1)
+    assert 0.08 < time.monotonic() - started < 0.5
+
+
+def test_an_empty_token_bucket_waits_for_refill():
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=60_000)
+    limiter.acquire(60_000)
+    started = time.monotonic()
+    limiter.acquire(100)
+    assert 0.08 < time.monotonic() - started < 0.5
+
+
+def test_oversized_requests_are_capped_to_the_bucket():
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=100)
+    limiter.acquire(1_000_000)
+
+
+def test_interactive_callers_are_served_before_waiting_batch_callers():
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=10_000)
+    limiter._requests = 0.0
+    order = []
+
+    def take(name, level):
+        limiter.acquire(1, level)
+        order.append(name)
+
+    batch = [threading.Thread(target=take, args=(f"batch{i}", BATCH)) for i in range(2)]
+    for thread in batch:
+        thread.start()
+    time.sleep(0.02)
+    interactive = threading.Thread(target=take, args=("interactive", INTERACTIVE))
+    interactive.start()
+    for thread in batch + [interactive]:
+        thread.join()
+
+    assert order == ["interactive", "batch0", "batch1"]
+
+
+def test_priority_context_sets_the_default_level():
+    assert rate_limit.request_priority.get() == INTERACTIVE
+    with priority(BATCH):
+        assert rate_limit.request_priority.get() == BATCH
+    assert rate_limit.request_priority.get() == INTERACTIVE
+
+
+def test_pause_holds_back_every_caller():
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=10_000)
+    limiter.pause(0.1)
+    started = time.monotonic()
+    limiter.acquire(1)
+    assert time.monotonic() - started >= 0.09
+
+
+def test_record_usage_returns_overestimated_tokens():
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=1_000)
+    limiter.acquire(1_000)
+    limiter.record_usage(estimated_tokens=1_000, actual_tokens=200)
+    started = time.monotonic()
+    limiter.acquire(700)
+    assert time.monotonic() - started < 0.05
+
+
+@pytest.mark.parametrize("headers, delay", [
+    ({"retry-after-ms": "250"}, 0.25),
+    ({"Retry-After": "2"}, 2.0),
+    ({"x-ratelimit-reset-requests": "1.5s", "x-ratelimit-reset-tokens": "6m0s"}, 360.0),
+    ({"x-ratelimit-reset-tokens": "250ms"}, 0.25),
+    ({}, 0.0),
+])
+def test_rate_limit_delay_reads_the_reset_headers(headers, delay):
+    assert rate_limit_delay(RateLimitError(headers)) == pytest.approx(delay)
+
+
+def test_rate_limit_delay_ignores_other_errors():
+    assert rate_limit_delay(ValueError("bad request")) is None
+
+
+def test_429_responses_are_retried():
+    limiter = TokenBucketLimiter(requests_per_minute=6_000, tokens_per_minute=100_000)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError()
+        return "ok"
+
+    assert call_with_rate_limit(limiter, flaky, 10) == "ok"
+    assert len(attempts) == 3
+
+
+def test_other_errors_are_not_retried():
+    limiter = TokenBucketLimiter(requests_per_minute=6_000, tokens_per_minute=100_000)
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        raise ValueError("bad request")
+
+    with pytest.raises(ValueError):
+        call_with_rate_limit(limiter, broken, 10)
+    assert len(attempts) == 1
+
+
+def test_retries_stop_after_the_limit(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_MAX_RETRIES", 2)
+    limiter = TokenBucketLimiter(requests_per_minute=6_000, tokens_per_minute=100_000)
+    attempts = []
+
+    def limited():
+        attempts.append(1)
+        raise RateLimitError()
+
+    with pytest.raises(RateLimitError):
+        call_with_rate_limit(limiter, limited, 10)
+    assert len(attempts) == 3
+
+
+def test_async_waits_leave_the_event_loop_free():
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=10_000)
+    limiter._requests = 0.0
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.ensure_future(tick())
+        await asyncio.gather(limiter.aacquire(1), limiter.aacquire(1))
+        ticker.cancel()
+        return ticks
+
+    # Two requests at one per 0.1s take about 0.2s, during which the loop keeps running
+    assert asyncio.run(main()) >= 10
+
+
+def test_threads_and_coroutines_share_one_queue():
+    limiter = TokenBucketLimiter(requests_per_minute=600, tokens_per_minute=10_000)
+    limiter._requests = 0.0
+    order = []
+
+    async def main():
+        waiting = asyncio.ensure_future(limiter.aacquire(1, BATCH))
+        await asyncio.sleep(0.02)
+        thread = threading.Thread(target=lambda: limiter.acquire(1, INTERACTIVE) or order.append("thread"))
+        thread.start()
+        await waiting
+        order.append("coroutine")
+        await asyncio.to_thread(thread.join)
+
+    asyncio.run(main())
+    assert order == ["thread", "coroutine"]
+
+
+def test_async_calls_are_retried_on_429():
+    limiter = TokenBucketLimiter(requests_per_minute=6_000, tokens_per_minute=100_000)
+    attempts = []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) < 2:
+            raise RateLimitError()
+        return {"total_tokens": 5}
+
+    result = asyncio.run(acall_with_rate_limit(limiter, flaky, 10, usage=lambda r: r["total_tokens"]))
+    assert result == {"total_tokens": 5}
+    assert len(attempts) == 2
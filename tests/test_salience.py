@@ -0,0 +1,59 @@
+from salience import split_sentences, score_sentences, select_salient
+from chunking import count_tokens
+
+FILLER = "Yeah so you know it was like really fun to just hang out and talk about stuff."
+FACTS = [
+    "A 2019 study found that sleeping six hours raises injury risk by 70 percent.",
+    "Researchers recommend 150 minutes of exercise per week according to the data.",
+]
+
+
+def _transcript():
+    sentences = [FILLER] * 20
+    sentences[5] = FACTS[0]
+    sentences[14] = FACTS[1]
+    return " ".join(sentences)
+
+
+def test_split_sentences_cuts_unpunctuated_runs():
+    text = "First sentence. " + " ".join(["word"] * 100)
+    sentences = split_sentences(text, max_words=40)
+    assert sentences[0] == "First sentence."
+    assert [len(s.split()) for s in sentences[1:]] == [40, 40, 20]
+
+
+def test_factual_sentences_score_above_filler():
+    scores = score_sentences([FILLER, FACTS[0], FILLER, FACTS[1]])
+    assert min(scores[1], scores[3]) > max(scores[0], scores[2])
+
+
+def test_text_within_budget_is_unchanged():
+    text = " ".join(FACTS)
+    shortened, stats = select_salient(text, max_tokens=10_000)
+    assert shortened == text
+    assert stats["reduction"] == 0.0
+    assert stats["kept_tokens"] == stats["input_tokens"]
+
+
+def test_select_salient_keeps_the_facts_within_budget():
+    text = _transcript()
+    budget = count_tokens(" ".join(FACTS)) + 10
+    shortened, stats = select_salient(text, max_tokens=budget, context=0)
+
+    for fact in FACTS:
+        assert fact in shortened
+    assert stats["kept_tokens"] <= budget
+    assert 0 < stats["reduction"] < 1
+
+
+def test_kept_sentences_stay_in_order_with_gaps_marked():
+    shortened, _ = select_salient(_transcript(), max_tokens=count_tokens(" ".join(FACTS)) + 10, context=0)
+    assert shortened.index(FACTS[0]) < shortened.index(FACTS[1])
+    assert "[...]" in shortened
+
+
+def test_context_keeps_neighbouring_sentences():
+    budget = count_tokens(" ".join(FACTS)) + 4 * count_tokens(FILLER) + 10
+    shortened, _ = select_salient(_transcript(), max_tokens=budget, context=1)
+    for fact in FACTS:
+        assert f"{FILLER} {fact} {FILLER}" in shortened
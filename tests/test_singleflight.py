@@ -0,0 +1,132 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import SingleFlight
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.001)
+
+
+def _start(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.start()
+    return thread
+
+
+def test_concurrent_calls_with_one_key_run_once():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+    results = []
+
+    def work():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "transcript"
+
+    leader = _start(lambda: results.append(flights.do("video", work)))
+    _wait_until(lambda: flights.in_flight("video"))
+    # Joined while the leader is still running
+    followers = [_start(lambda: results.append(flights.do("video", work))) for _ in range(4)]
+    time.sleep(0.05)
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert calls == [1]
+    assert results == ["transcript"] * 5
+
+
+def test_joined_callers_receive_the_leaders_exception():
+    flights = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fail():
+        release.wait(timeout=5)
+        raise ValueError("no transcript")
+
+    def call():
+        try:
+            flights.do("video", fail)
+        except ValueError as e:
+            errors.append(str(e))
+
+    leader = _start(call)
+    _wait_until(lambda: flights.in_flight("video"))
+    follower = _start(call)
+    time.sleep(0.05)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert errors == ["no transcript", "no transcript"]
+
+
+def test_finished_calls_are_forgotten():
+    flights = SingleFlight()
+    calls = []
+    assert flights.do("video", lambda: calls.append(1) or len(calls)) == 1
+    assert not flights.in_flight("video")
+    assert flights.do("video", lambda: calls.append(1) or len(calls)) == 2
+
+
+def test_different_keys_do_not_coalesce():
+    flights = SingleFlight()
+    barrier = threading.Barrier(2, timeout=5)
+    results = []
+    threads = [_start(lambda key=key: results.append(flights.do(key, lambda: barrier.wait() is not None)))
+               for key in ("a", "b")]
+    for thread in threads:
+        thread.join()
+    assert results == [True, True]
+
+
+def test_async_callers_join_each_other():
+    flights = SingleFlight()
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(flights.ado("video", work) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["result"] * 3
+    assert calls == [1]
+
+
+def test_async_caller_joins_a_call_started_on_a_thread():
+    flights = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        release.wait(timeout=5)
+        return "result"
+
+    async def never_called():
+        pytest.fail("the in-flight call should have been joined")
+
+    leader = _start(flights.do, "video", work)
+    _wait_until(lambda: flights.in_flight("video"))
+
+    async def main():
+        joined = asyncio.ensure_future(flights.ado("video", never_called))
+        await asyncio.sleep(0.05)
+        release.set()
+        return await joined
+
+    assert asyncio.run(main()) == "result"
+    leader.join()
+    assert calls == [1]
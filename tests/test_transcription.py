@@ -0,0 +1,67 @@
+import numpy as np
+
+from transcription import find_segments, SegmentStitcher, stitch_segments
+
+RATE = 1000
+
+
+def _speech_with_pauses(seconds, pauses):
+    """Noise standing in for speech, silent during each (start, end) pause in seconds"""
+    audio = np.random.default_rng(0).normal(0, 0.5, int(seconds * RATE)).astype(np.float32)
+    for start, end in pauses:
+        audio[int(start * RATE):int(end * RATE)] = 0
+    return audio
+
+
+def test_short_audio_is_one_segment():
+    audio = _speech_with_pauses(5, [])
+    assert find_segments(audio, chunk_seconds=10, search_seconds=2, sample_rate=RATE) == [(0, len(audio))]
+
+
+def test_cuts_fall_in_the_pauses_near_each_chunk_boundary():
+    pauses = [(9.5, 10.5), (20.8, 21.6), (31.0, 31.4)]
+    audio = _speech_with_pauses(35, pauses)
+    segments = find_segments(audio, chunk_seconds=10, overlap_seconds=0, search_seconds=2, sample_rate=RATE)
+
+    assert len(segments) == 4
+    assert segments[0][0] == 0 and segments[-1][1] == len(audio)
+    for (start, end), (pause_start, pause_end) in zip(segments, pauses):
+        assert pause_start * RATE <= end <= pause_end * RATE
+    # Without overlap the segments tile the audio
+    assert all(end == next_start for (_, end), (next_start, _) in zip(segments, segments[1:]))
+
+
+def test_later_segments_start_overlap_seconds_early():
+    audio = _speech_with_pauses(35, [(9.5, 10.5), (20.8, 21.6)])
+    plain = find_segments(audio, chunk_seconds=10, overlap_seconds=0, search_seconds=2, sample_rate=RATE)
+    overlapped = find_segments(audio, chunk_seconds=10, overlap_seconds=0.5, search_seconds=2, sample_rate=RATE)
+
+    assert overlapped[0] == plain[0]
+    for (start, end), (plain_start, plain_end) in zip(overlapped[1:], plain[1:]):
+        assert start == plain_start - 500
+        assert end == plain_end
+
+
+def test_stitcher_drops_words_repeated_across_a_boundary():
+    stitcher = SegmentStitcher()
+    assert stitcher.add("we measured the effect over three years") == "we measured the effect over three years"
+    # Whisper often re-capitalizes or re-punctuates the overlapping words
+    assert stitcher.add("Three years. And the results held") == "And the results held"
+    assert stitcher.text == "we measured the effect over three years And the results held"
+
+
+def test_stitcher_keeps_segments_without_overlap_whole():
+    stitcher = SegmentStitcher()
+    stitcher.add("first part")
+    assert stitcher.add("second part") == "second part"
+    assert stitcher.text == "first part second part"
+
+
+def test_stitcher_only_looks_max_overlap_words_back():
+    stitcher = SegmentStitcher(max_overlap_words=2)
+    stitcher.add("one two three")
+    assert stitcher.add("one two three four") == "one two three four"
+
+
+def test_stitch_segments_joins_in_order():
+    assert stitch_segments(["a b c", "b c d", "d e"]) == "a b c d e"
@@ -0,0 +1,152 @@
+# ===============================
+# File: transcript_cache.py
+# ===============================
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class TranscriptCache:
+    """
+    On-disk transcript store with an in-memory LRU in front of it.
+
+    Entries are content-addressed by a hash of (video ID, transcription source,
+    model) and written atomically, so readers never see a partial file. The
+    store is bounded by total size on disk and by entry age.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float, memory_entries: int = 32):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.memory_entries = memory_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(video_id: str, source: str, model: str = None) -> str:
+        """Hash the identifying parts of a transcript into a cache key"""
+        raw = json.dumps([video_id, source, model or ""])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _expired(self, created_at: float) -> bool:
+        return self.ttl_seconds > 0 and time.time() - created_at > self.ttl_seconds
+
+    def _remember(self, key: str, entry: dict):
+        """Insert into the memory LRU, dropping the least recently used entry"""
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, video_id: str, source: str, model: str = None) -> Optional[str]:
+        """Return a cached transcript, or None on a miss or an expired entry"""
+        entry = self.get_entry(video_id, source, model)
+        return entry["text"] if entry is not None else None
+
+    def get_entry(self, video_id: str, source: str, model: str = None) -> Optional[Dict]:
+        """Return a cached transcript with its metadata and segment timings, if any"""
+        key = self.make_key(video_id, source, model)
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry["created_at"]):
+                    self._memory.move_to_end(key)
+                    return entry
+                del self._memory[key]
+
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if self._expired(entry.get("created_at", 0)):
+            self._remove(path)
+            return None
+
+        # Touch the file so disk eviction is least-recently-used as well
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+        with self._lock:
+            self._remember(key, entry)
+        return entry
+
+    def put(self, video_id: str, source: str, text: str, model: str = None, timings: Dict = None):
+        """
+        Store a transcript, then evict old entries if the store is over budget.
+
+        timings, when known, holds "starts" (seconds) and "offsets" (characters
+        into text) of the transcript's segments.
+        """
+        key = self.make_key(video_id, source, model)
+        entry = {
+            "video_id": video_id,
+            "source": source,
+            "model": model,
+            "created_at": time.time(),
+            "text": text,
+            "timings": timings,
+        }
+
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(entry, f)
+            os.replace(tmp_path, self._path(key))
+        except Exception:
+            self._remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._remember(key, entry)
+        self._evict()
+
+    def _remove(self, path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Drop expired entries, then the least recently used until under max_bytes"""
+        try:
+            names = [n for n in os.listdir(self.directory) if n.endswith(".json")]
+        except OSError:
+            return
+
+        files = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            if self.ttl_seconds > 0 and time.time() - stat.st_mtime > self.ttl_seconds:
+                self._remove(path)
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+            key = os.path.basename(path)[:-len(".json")]
+            with self._lock:
+                self._memory.pop(key, None)
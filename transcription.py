@@ -0,0 +1,307 @@
+# ===============================
+# File: transcription.py
+# ===============================
+import os
+import re
+import subprocess
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Tuple
+import numpy as np
+import yt_dlp
+import whisper
+from config import WHISPER_MODEL, WHISPER_WORKERS, WHISPER_CHUNK_SECONDS, WHISPER_CHUNK_OVERLAP
+
+SAMPLE_RATE = whisper.audio.SAMPLE_RATE
+
+# Process-wide registry of loaded Whisper models, one entry per model name
+_models = {}
+_model_locks = {}
+_registry_lock = threading.Lock()
+
+
+def _model_lock(name: str) -> threading.Lock:
+    with _registry_lock:
+        return _model_locks.setdefault(name, threading.Lock())
+
+
+def get_whisper_model(name: str = WHISPER_MODEL):
+    """Load a Whisper model on first use and reuse it for the life of the process"""
+    model = _models.get(name)
+    if model is None:
+        with _model_lock(name):
+            model = _models.get(name)
+            if model is None:
+                model = whisper.load_model(name)
+                _models[name] = model
+    return model
+
+
+def transcribe_audio(audio, model_name: str = WHISPER_MODEL, **options) -> dict:
+    """
+    Transcribe an audio file path or 16 kHz waveform with a shared model.
+
+    Whisper installs its kv-cache hooks on the model itself for every decode,
+    so calls on the same model are serialized; different models run freely.
+    """
+    model = get_whisper_model(model_name)
+    with _model_lock(model_name):
+        return model.transcribe(audio, **options)
+
+
+def _decode_command(url: str, sample_rate: int) -> list:
+    """Resolve a video's best audio stream and build the ffmpeg command that decodes it to 16-bit PCM"""
+    with yt_dlp.YoutubeDL({'format': 'bestaudio/best', 'quiet': True}) as ydl:
+        info = ydl.extract_info(url, download=False)
+
+    stream_url = info.get('url')
+    if not stream_url:
+        raise ValueError(f"No direct audio stream found for {url}")
+
+    cmd = ["ffmpeg", "-nostdin", "-threads", "0", "-loglevel", "error"]
+    headers = info.get('http_headers') or {}
+    if headers:
+        cmd += ["-headers", "".join(f"{key}: {value}\r\n" for key, value in headers.items())]
+    cmd += ["-i", stream_url, "-vn", "-f", "s16le", "-ac", "1", "-acodec", "pcm_s16le",
+            "-ar", str(sample_rate), "-"]
+    return cmd
+
+
+def _pcm_to_float(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, np.int16).flatten().astype(np.float32) / 32768.0
+
+
+def load_audio_stream(url: str, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decode a video's best audio stream straight into a mono float32 waveform.
+
+    yt-dlp only resolves the stream URL; ffmpeg reads it over HTTP and writes
+    16 kHz PCM to a pipe, so nothing is re-encoded or written to disk.
+    """
+    cmd = _decode_command(url, sample_rate)
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='ignore')}") from e
+
+    return _pcm_to_float(out)
+
+
+def iter_audio_segments(url: str, chunk_seconds: float = WHISPER_CHUNK_SECONDS,
+                        overlap_seconds: float = WHISPER_CHUNK_OVERLAP, search_seconds: float = 10.0,
+                        sample_rate: int = SAMPLE_RATE) -> Iterator[Tuple[float, np.ndarray]]:
+    """
+    Yield a video's audio in the segments find_segments would cut, while ffmpeg is still decoding,
+    each with its start time in seconds.
+
+    A segment is yielded once enough audio has arrived to place its cut;
+    the pipe is only read as fast as the caller consumes segments.
+    """
+    cmd = _decode_command(url, sample_rate)
+    # Enough audio to choose a cut anywhere in the search window after the target length
+    needed = int((chunk_seconds + search_seconds) * sample_rate)
+    block_bytes = 2 * sample_rate * 5
+
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        buffer = np.empty(0, np.float32)
+        # Sample position of the buffer's start in the whole audio
+        position = 0
+        while True:
+            data = process.stdout.read(block_bytes)
+            if data:
+                buffer = np.concatenate([buffer, _pcm_to_float(data[:len(data) // 2 * 2])])
+            while len(buffer) > needed:
+                segments = find_segments(buffer, chunk_seconds, overlap_seconds, search_seconds,
+                                         sample_rate=sample_rate)
+                yield position / sample_rate, buffer[:segments[0][1]]
+                buffer = buffer[segments[1][0]:]
+                position += segments[1][0]
+            if not data:
+                break
+
+        if process.wait() != 0:
+            raise RuntimeError(f"Failed to decode audio: {process.stderr.read().decode(errors='ignore')}")
+        if len(buffer):
+            yield position / sample_rate, buffer
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+
+def find_segments(audio: np.ndarray, chunk_seconds: float = WHISPER_CHUNK_SECONDS,
+                  overlap_seconds: float = WHISPER_CHUNK_OVERLAP, search_seconds: float = 10.0,
+                  frame_ms: int = 30, sample_rate: int = SAMPLE_RATE) -> list:
+    """
+    Split a waveform into (start, end) sample ranges of roughly chunk_seconds.
+
+    Each cut is placed at the quietest frame within search_seconds of the
+    target length, so words are rarely split. Every segment after the first
+    starts overlap_seconds early; the overlap is removed again when stitching.
+    """
+    frame = int(sample_rate * frame_ms / 1000)
+    chunk = int(chunk_seconds * sample_rate)
+    search = int(search_seconds * sample_rate)
+    overlap = int(overlap_seconds * sample_rate)
+
+    n_frames = len(audio) // frame
+    if n_frames == 0 or len(audio) <= chunk + search:
+        return [(0, len(audio))]
+    frames = audio[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+
+    cuts = [0]
+    while len(audio) - cuts[-1] > chunk + search:
+        target = cuts[-1] + chunk
+        lo = max((target - search) // frame, cuts[-1] // frame + 1)
+        hi = min((target + search) // frame, n_frames)
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        cuts.append(quietest * frame + frame // 2)
+    cuts.append(len(audio))
+
+    return [(max(0, start - overlap) if i else start, end)
+            for i, (start, end) in enumerate(zip(cuts[:-1], cuts[1:]))]
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+class SegmentStitcher:
+    """Join segment transcripts one at a time, dropping words repeated across a segment boundary"""
+
+    def __init__(self, max_overlap_words: int = 30):
+        self.max_overlap_words = max_overlap_words
+        self.words = []
+
+    def add(self, text: str) -> str:
+        """Append the next segment's transcript and return the text it contributed"""
+        new_words = text.split()
+        tail = [_normalize_word(w) for w in self.words[-self.max_overlap_words:]]
+        head = [_normalize_word(w) for w in new_words[:self.max_overlap_words]]
+
+        # Longest suffix of the transcript so far that the new segment starts with
+        overlap = 0
+        for size in range(min(len(tail), len(head)), 0, -1):
+            if tail[-size:] == head[:size]:
+                overlap = size
+                break
+        self.words.extend(new_words[overlap:])
+        return " ".join(new_words[overlap:])
+
+    @property
+    def text(self) -> str:
+        return " ".join(self.words)
+
+
+def stitch_segments(texts, max_overlap_words: int = 30) -> str:
+    """Join segment transcripts in order, dropping words repeated across a segment boundary"""
+    stitcher = SegmentStitcher(max_overlap_words)
+    for text in texts:
+        stitcher.add(text)
+    return stitcher.text
+
+
+# Worker-process state: each worker loads its model once and keeps it warm
+_worker_model = None
+
+
+def _init_worker(model_name: str, threads_per_worker: int):
+    global _worker_model
+    import torch
+    torch.set_num_threads(threads_per_worker)
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_segment(segment: np.ndarray) -> str:
+    return _worker_model.transcribe(segment)["text"]
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(model_name: str, workers: int) -> ProcessPoolExecutor:
+    """Return a long-lived process pool whose workers already hold the model"""
+    with _pools_lock:
+        key = (model_name, workers)
+        if key not in _pools:
+            threads_per_worker = max(1, (os.cpu_count() or 1) // workers)
+            _pools[key] = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(model_name, threads_per_worker)
+            )
+        return _pools[key]
+
+
+def _transcribe_on_pool(audio: np.ndarray, segments, model_name: str, workers: int) -> str:
+    pool = _get_pool(model_name, workers)
+    texts = pool.map(_transcribe_segment, [audio[start:end] for start, end in segments])
+    return stitch_segments(list(texts))
+
+
+def transcribe_chunked(audio, model_name: str = WHISPER_MODEL, workers: int = WHISPER_WORKERS,
+                       chunk_seconds: float = WHISPER_CHUNK_SECONDS) -> str:
+    """Transcribe an audio file path or waveform by splitting it at silences across a process pool"""
+    if isinstance(audio, str):
+        audio = whisper.load_audio(audio)
+
+    segments = find_segments(audio, chunk_seconds=chunk_seconds)
+    if len(segments) == 1:
+        return transcribe_audio(audio, model_name)["text"]
+    return _transcribe_on_pool(audio, segments, model_name, workers)
+
+
+def transcribe_url(url: str, model_name: str = WHISPER_MODEL, in_pool: bool = False) -> str:
+    """
+    Decode a video's audio in memory and transcribe it.
+
+    With in_pool, Whisper always runs in the worker processes, never in the
+    calling one, even for a single segment or WHISPER_WORKERS=1.
+    """
+    audio = load_audio_stream(url)
+    if in_pool:
+        segments = find_segments(audio)
+        return _transcribe_on_pool(audio, segments, model_name, max(1, WHISPER_WORKERS))
+    if WHISPER_WORKERS > 1:
+        return transcribe_chunked(audio, model_name)
+    return transcribe_audio(audio, model_name)["text"]
+
+
+def iter_transcript(url: str, model_name: str = WHISPER_MODEL, workers: int = WHISPER_WORKERS,
+                    max_pending: int = None) -> Iterator[Tuple[float, str]]:
+    """
+    Transcribe a video while its audio is still being decoded, yielding the transcript piece by piece
+    with the start time of the segment it came from.
+
+    Segments go to the worker process pool as soon as they are cut, with at
+    most max_pending (default twice the workers) in flight, so decoding waits
+    for Whisper and Whisper for the caller. Pieces come out in audio order
+    with the words repeated across segment boundaries already removed.
+    """
+    workers = max(1, workers)
+    max_pending = max_pending or 2 * workers
+    pool = _get_pool(model_name, workers)
+    stitcher = SegmentStitcher()
+    pending = deque()
+    segments = iter_audio_segments(url)
+
+    try:
+        for start, segment in segments:
+            pending.append((start, pool.submit(_transcribe_segment, segment)))
+            while len(pending) >= max_pending or (pending and pending[0][1].done()):
+                start, future = pending.popleft()
+                yield start, stitcher.add(future.result())
+        while pending:
+            start, future = pending.popleft()
+            yield start, stitcher.add(future.result())
+    finally:
+        # Closed early by the caller: stop ffmpeg and cancel segments not yet transcribing
+        segments.close()
+        for _, future in pending:
+            future.cancel()
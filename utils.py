@@ -1,9 +1,20 @@
-import os
-import json
 import urllib.parse
 from youtube_transcript_api import YouTubeTranscriptApi, NoTranscriptFound, TranscriptsDisabled, VideoUnavailable
-import yt_dlp
-import whisper
+from transcript_cache import TranscriptCache
+from telemetry import span
+from config import (WHISPER_MODEL, TRANSCRIPT_CACHE_DIR, TRANSCRIPT_CACHE_MAX_BYTES,
+                    TRANSCRIPT_CACHE_TTL, TRANSCRIPT_CACHE_MEMORY_ENTRIES)
+
+# Shared across sessions so re-analyzing a video skips captions and Whisper
+transcript_cache = TranscriptCache(
+    TRANSCRIPT_CACHE_DIR,
+    max_bytes=TRANSCRIPT_CACHE_MAX_BYTES,
+    ttl_seconds=TRANSCRIPT_CACHE_TTL,
+    memory_entries=TRANSCRIPT_CACHE_MEMORY_ENTRIES
+)
+
+# Sources in order of preference, paired with the model that produced them
+TRANSCRIPT_SOURCES = [("manual", None), ("generated", None), ("whisper", WHISPER_MODEL)]
 
 def extract_video_id(url):
     """Extract YouTube video ID from URL"""
@@ -19,12 +30,56 @@ def extract_video_id(url):
             return parsed_url.path.split('/')[2]
     return None
 
-def get_youtube_transcription(url: str) -> str:
-    """Get transcription from YouTube video"""
+def join_segments(segments) -> tuple:
+    """
+    Join caption segments into one transcript, keeping where each segment
+    starts in the audio (seconds) and in the text (character offset).
+    """
+    texts, starts, offsets, position = [], [], [], 0
+    for segment in segments:
+        starts.append(round(float(segment['start']), 2))
+        offsets.append(position)
+        texts.append(segment['text'])
+        position += len(segment['text']) + 1
+    return ' '.join(texts), {"starts": starts, "offsets": offsets}
+
+def get_transcript_timings(video_id: str) -> dict:
+    """Segment timings of the cached transcript get_youtube_transcription returns, if known"""
+    for source, model in TRANSCRIPT_SOURCES:
+        entry = transcript_cache.get_entry(video_id, source, model)
+        if entry is not None:
+            return entry.get("timings")
+    return None
+
+def get_youtube_transcription(url: str, whisper_in_pool: bool = False, allow_whisper: bool = True,
+                              attributes: dict = None) -> str:
+    """
+    Get transcription from YouTube video; whisper_in_pool keeps Whisper out of this process.
+
+    With allow_whisper=False, a video that would need Whisper returns None
+    so the caller can transcribe it itself. Where the transcript came from
+    is recorded on a "transcription" span, or on the attributes of one the
+    caller has open.
+    """
     video_id = extract_video_id(url)
     if not video_id:
         return None
 
+    if attributes is not None:
+        return _get_youtube_transcription(url, video_id, attributes, whisper_in_pool, allow_whisper)
+    with span("transcription", video_id=video_id) as attributes:
+        return _get_youtube_transcription(url, video_id, attributes, whisper_in_pool, allow_whisper)
+
+def _get_youtube_transcription(url: str, video_id: str, attributes: dict, whisper_in_pool: bool = False,
+                               allow_whisper: bool = True) -> str:
+    """Fetch a transcript from the cache, YouTube captions or Whisper, recording which on the span"""
+    for source, model in TRANSCRIPT_SOURCES:
+        cached = transcript_cache.get(video_id, source, model)
+        if cached is not None:
+            attributes.update(source=source, cache_hit=True)
+            return cached
+    attributes["cache_hit"] = False
+
     try:
         # Try YouTube subtitles first
         transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
@@ -34,7 +89,10 @@ def get_youtube_transcription(url: str) -> str:
             if not transcript.is_generated:
                 try:
                     transcript_data = transcript.fetch()
-                    return ' '.join([t['text'] for t in transcript_data])
+                    text, timings = join_segments(transcript_data)
+                    attributes["source"] = "manual"
+                    transcript_cache.put(video_id, "manual", text, timings=timings)
+                    return text
                 except Exception:
                     continue
 
@@ -43,34 +101,26 @@ def get_youtube_transcription(url: str) -> str:
             if transcript.is_generated:
                 try:
                     transcript_data = transcript.fetch()
-                    return ' '.join([t['text'] for t in transcript_data])
+                    text, timings = join_segments(transcript_data)
+                    attributes["source"] = "generated"
+                    transcript_cache.put(video_id, "generated", text, timings=timings)
+                    return text
                 except Exception:
                     continue
 
-        # If no transcripts available, use Whisper
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-            'outtmpl': 'audio_file.%(ext)s',
-            'quiet': True,
-        }
+        if not allow_whisper:
+            attributes["source"] = "deferred"
+            return None
 
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            ydl.download([url])
+        # If no transcripts available, use Whisper (imported here: it pulls in torch)
+        from transcription import transcribe_url
 
-        audio_file = "audio_file.mp3"
-        whisper_model = whisper.load_model("small")
-        result = whisper_model.transcribe(audio_file)
+        attributes["source"] = "whisper"
+        with span("whisper", model=WHISPER_MODEL):
+            text = transcribe_url(url, WHISPER_MODEL, in_pool=whisper_in_pool)
 
-        # Clean up
-        if os.path.exists(audio_file):
-            os.remove(audio_file)
-            
-        return result["text"]
+        transcript_cache.put(video_id, "whisper", text, WHISPER_MODEL)
+        return text
         
     except (NoTranscriptFound, TranscriptsDisabled, VideoUnavailable) as e:
         return f"Error: {str(e)}"
\ No newline at end of file